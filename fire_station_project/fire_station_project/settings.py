@@ -82,6 +82,8 @@ DATABASES = {
         'PASSWORD': 'admin',  # пароль
         'HOST': 'localhost',      # или IP сервера БД
         'PORT': '5432',           # стандартный порт PostgreSQL
+        'CONN_MAX_AGE': 60,       # держим соединение между запросами (сек)
+        'CONN_HEALTH_CHECKS': True,  # проверяем его перед повторным использованием
     }
 }
 
@@ -97,6 +99,22 @@ REST_FRAMEWORK = {
 }
 
 
+# Хеширование паролей: первый хешер — для новых паролей, остальные — для
+# проверки уже сохранённых хешей (PBKDF2 по умолчанию Django).
+# В тестах можно поставить первым 'django.contrib.auth.hashers.MD5PasswordHasher',
+# чтобы создание пользователей не упиралось в CPU.
+PASSWORD_HASHERS = [
+    'fuel.hashers.BCryptSHA256PasswordHasher',
+    'fuel.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Целевое время одного хеширования пароля, мс (см. calibrate_hasher)
+PASSWORD_HASH_TARGET_MS = 250
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -16,20 +16,48 @@ from .models import (
 )
 
 
-# Самый простой вариант — просто зарегистрировать модели
-
-admin.site.register(Role)
-admin.site.register(User)
-admin.site.register(Permission)
-
-admin.site.register(PassengerCar)
-admin.site.register(PassengerCarWaybill)
-admin.site.register(PassengerCarWaybillRecord)
-admin.site.register(OdometerFuelPassengerCar)
-admin.site.register(NormsPassengerCars)
-
-admin.site.register(FireTruck)
-admin.site.register(FireTruckWaybill)
-admin.site.register(FireTruckWaybillRecord)
-admin.site.register(OdometerFuelFireTruck)
-admin.site.register(NormsFireTruck)
\ No newline at end of file
+class WaybillChoicesAdmin(admin.ModelAdmin):
+    """
+    В выпадающих списках путевых листов каждый вариант выводится через
+    __str__, который берёт car.number — подтягиваем машину JOIN'ом.
+    """
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        related = db_field.related_model
+        if 'queryset' not in kwargs and related in (PassengerCarWaybill, FireTruckWaybill):
+            kwargs['queryset'] = related.objects.select_related('car')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class CarRelatedAdmin(WaybillChoicesAdmin):
+    """
+    Для моделей, у которых __str__ берёт self.car.number:
+    машину подтягиваем JOIN'ом, а не отдельным запросом на каждую строку.
+    """
+    list_select_related = ('car',)
+
+
+# Самый простой вариант — просто зарегистрировать модели (одним вызовом)
+
+admin.site.register([
+    Role,
+    User,
+    Permission,
+
+    PassengerCar,
+    FireTruck,
+])
+
+admin.site.register([
+    PassengerCarWaybillRecord,
+    FireTruckWaybillRecord,
+], WaybillChoicesAdmin)
+
+admin.site.register([
+    PassengerCarWaybill,
+    OdometerFuelPassengerCar,
+    NormsPassengerCars,
+
+    FireTruckWaybill,
+    OdometerFuelFireTruck,
+    NormsFireTruck,
+], CarRelatedAdmin)
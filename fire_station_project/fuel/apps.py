@@ -1,11 +1,15 @@
 # fuel/apps.py
+from importlib import import_module
+
 from django.apps import AppConfig
 
 
 class FuelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fuel'
+    label = 'fuel'
 
     def ready(self):
         # импортируем сигналы при старте приложения
-        import fuel.signals  # noqa
\ No newline at end of file
+        # (модуль грузится один раз на процесс — повторно из sys.modules)
+        import_module('fuel.signals')
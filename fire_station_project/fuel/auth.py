@@ -1,28 +1,136 @@
 # fuel/auth.py
 import jwt
+import hmac
+import orjson
+import time
+import base64
 import hashlib
-from datetime import datetime, timedelta, timezone
+import threading
+from functools import lru_cache
+
+from cachetools import TTLCache
 
 from django.conf import settings
 from rest_framework import authentication, exceptions
 
-from .models import User
+from .models import Role, User
+
+
+# Публичный API модуля (используется в settings, views_auth, signals)
+__all__ = [
+    'JWTAuthentication',
+    'create_access_token',
+    'decode_access_token',
+    'invalidate_user_cache',
+]
+
+
+class _FastHMAC(jwt.algorithms.HMACAlgorithm):
+    """
+    HMAC для PyJWT одним вызовом hmac.digest (C/OpenSSL) вместо
+    hmac.new(...).digest(). Подготовленный ключ запоминаем: у нас он один
+    на весь процесс, а prepare_key в PyJWT делает несколько проверок.
+    """
+
+    def __init__(self, hash_alg):
+        super().__init__(hash_alg)
+        self._digest_name = hash_alg().name
+        self._prepared = {}
+
+    def prepare_key(self, key):
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = super().prepare_key(key)
+            if len(self._prepared) < 8:
+                self._prepared[key] = prepared
+        return prepared
+
+    def sign(self, msg, key):
+        return hmac.digest(key, msg, self._digest_name)
+
+    def verify(self, msg, key, sig):
+        return hmac.compare_digest(sig, hmac.digest(key, msg, self._digest_name))
 
 
 JWT_SECRET = settings.SECRET_KEY
 JWT_ALGORITHM = 'HS256'
+
+# Свой экземпляр PyJWS только с нашим HS256: публичный register_algorithm,
+# глобальные jwt.encode/jwt.decode и их алгоритмы не трогаем.
+_jws = jwt.PyJWS(algorithms=[])
+_jws.register_algorithm(JWT_ALGORITHM, _FastHMAC(_FastHMAC.SHA256))
 ACCESS_TOKEN_LIFETIME_MINUTES = 60
 
+# Константы на всё время жизни процесса: секрет сразу в bytes (PyJWT не
+# перекодирует его на каждом вызове) и срок жизни токена в секундах.
+_SECRET_BYTES = JWT_SECRET.encode('utf-8') if isinstance(JWT_SECRET, str) else JWT_SECRET
+_LIFETIME_SECONDS = ACCESS_TOKEN_LIFETIME_MINUTES * 60
+
+# Заголовок у наших токенов всегда один и тот же — {"alg":"HS256","typ":"JWT"}
+# (ровно так его сериализует PyJWT), поэтому храним его уже в base64url.
+_HEADER_B64 = b"eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"
+
+# Кэш уже проверенных токенов: ключ — blake2b от токена (сам токен в памяти
+# не храним), значение — payload. Ошибки не кэшируем.
+DECODE_CACHE_TTL_SECONDS = 15
+_decode_cache = TTLCache(maxsize=10000, ttl=DECODE_CACHE_TTL_SECONDS)
+_decode_cache_lock = threading.Lock()
+
+# Отказы кэшируем отдельно и ненадолго: повтор того же плохого токена
+# отклоняется сразу, без jwt.decode и без запроса в БД.
+# Значение — текст ошибки для AuthenticationFailed.
+REJECT_CACHE_TTL_SECONDS = 5
+_reject_cache = TTLCache(maxsize=10000, ttl=REJECT_CACHE_TTL_SECONDS)
+
+# Кэш пользователей для JWTAuthentication: ключ — (user_id, pwd_fp),
+# значение — кортеж значений колонок строки, а не сам объект User:
+# каждому запросу собираем свой экземпляр (User.from_db), общий
+# изменяемый request.user между параллельными запросами не делим.
+# Смена пароля меняет pwd_fp, поэтому старые записи просто перестают
+# находиться. save()/delete() пользователя (сигналы) и массовое мягкое
+# удаление (UserQuerySet.delete) сбрасывают кэш, но только в своём
+# процессе: в остальных воркерах правка роли или удаление пользователя
+# вступают в силу не позже чем через USER_CACHE_TTL_SECONDS.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+_USER_ATTNAMES = tuple(field.attname for field in User._meta.concrete_fields)
+_ROLE_ATTNAMES = tuple(field.attname for field in Role._meta.concrete_fields)
+
+
+@lru_cache(maxsize=4096)
+def _fingerprint_of_hash(password_hash: str) -> str:
+    # user.password уже хеш (make_password). Дополнительно хэшируем его,
+    # чтобы не класть в токен исходный хеш из БД.
+    # blake2b(16) быстрее SHA-256 и даёт 22 символа base64url вместо 43.
+    digest = hashlib.blake2b(password_hash.encode('utf-8'), digest_size=16).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
 
 def _password_fingerprint(user: User) -> str:
     """
     Возвращает отпечаток текущего пароля пользователя.
     Основан на уже захешированном поле user.password.
     Если пароль поменяли (как угодно) — отпечаток сменится.
+    Результат кэшируется по значению хеша, поэтому на каждом запросе
+    хеш не пересчитывается.
     """
-    # user.password уже хеш (make_password). Дополнительно хэшируем его,
-    # чтобы не класть в токен исходный хеш из БД.
-    return hashlib.sha256(user.password.encode('utf-8')).hexdigest()
+    return _fingerprint_of_hash(user.password)
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _encode_hs256(payload: dict) -> str:
+    """
+    Минимальный jwt.encode для HS256: готовый заголовок + orjson + hmac.digest.
+    Это обычный HS256 JWT; для ASCII-данных он побайтно совпадает с PyJWT
+    (orjson не экранирует не-ASCII символы, json.dumps — экранирует).
+    """
+    signing_input = _HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    signature = hmac.digest(_SECRET_BYTES, signing_input, "sha256")
+    return (signing_input + b"." + _b64url(signature)).decode("ascii")
 
 
 def create_access_token(user: User, client_type: str = "web") -> str:
@@ -31,25 +139,101 @@ def create_access_token(user: User, client_type: str = "web") -> str:
     client_type: "web" или "mobile".
     В токен добавляем 'pwd_fp' — отпечаток текущего пароля.
     """
-    now = datetime.now(timezone.utc)
+    now_ts = int(time.time())  # iat/exp сразу в секундах epoch
     payload = {
         "sub": user.id,
         "login": user.login,
         "role": user.role_id,
         "client": client_type,
         "pwd_fp": _password_fingerprint(user),  # отпечаток пароля
-        "iat": now,
-        "exp": now + timedelta(minutes=ACCESS_TOKEN_LIFETIME_MINUTES),
+        "iat": now_ts,
+        "exp": now_ts + _LIFETIME_SECONDS,
     }
-    token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
-    return token
+    return _encode_hs256(payload)
 
 
-def decode_access_token(token: str) -> dict:
+def _jwt_decode(raw: bytes) -> dict:
     """
-    Декодирует и проверяет access-токен.
+    Проверка подписи через _jws и разбор payload'а через orjson.
+    Из claim'ов проверяем только exp — другие (nbf, aud, iss) мы не выдаём;
+    sub у нас — id пользователя числом, поэтому его тип не проверяем.
     """
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    decoded = _jws.decode_complete(raw, _SECRET_BYTES, algorithms=[JWT_ALGORITHM])
+    try:
+        payload = orjson.loads(decoded["payload"])
+    except orjson.JSONDecodeError as e:
+        raise jwt.DecodeError(f"Invalid payload string: {e}") from e
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload string: must be a json object")
+
+    if "exp" not in payload:
+        raise jwt.MissingRequiredClaimError("exp")
+    try:
+        exp = int(payload["exp"])
+    except (ValueError, TypeError, OverflowError):
+        raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.") from None
+    if exp <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
+
+
+def _token_key(raw: bytes) -> bytes:
+    """
+    Ключ токена в кэшах: сам токен в памяти не храним.
+    """
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def decode_access_token(token: str | bytes, key: bytes | None = None) -> dict:
+    """
+    Декодирует и проверяет access-токен (str или bytes прямо из заголовка).
+    Повторные запросы с тем же токеном в течение DECODE_CACHE_TTL_SECONDS
+    берут payload из кэша, минуя HMAC и разбор JSON.
+    key — уже посчитанный _token_key(token), если он есть у вызывающего.
+    """
+    raw = token if isinstance(token, bytes) else token.encode('utf-8')
+    if key is None:
+        key = _token_key(raw)
+
+    with _decode_cache_lock:
+        payload = _decode_cache.get(key)
+
+    # exp проверяем и для закэшированного payload — иначе истёкший токен
+    # мог бы прожить в кэше ещё до DECODE_CACHE_TTL_SECONDS
+    if payload is not None and payload["exp"] > time.time():
+        return payload
+
+    payload = _jwt_decode(raw)
+
+    with _decode_cache_lock:
+        _decode_cache[key] = payload
+    return payload
+
+
+# Горячие имена для authenticate(): один LOAD_GLOBAL вместо цепочки атрибутов
+_EXPIRED = jwt.ExpiredSignatureError
+_INVALID = jwt.InvalidTokenError
+_AUTH_FAIL = exceptions.AuthenticationFailed
+_GET_AUTH = authentication.get_authorization_header
+
+
+def invalidate_user_cache(user_id) -> None:
+    """
+    Удаляет из кэша аутентификации все записи указанного пользователя.
+    """
+    with _user_cache_lock:
+        for key in [k for k in _user_cache.keys() if k[0] == user_id]:
+            _user_cache.pop(key, None)
+
+
+def _reject(key: bytes, message: str) -> exceptions.AuthenticationFailed:
+    """
+    Запоминает отказ по токену на REJECT_CACHE_TTL_SECONDS и возвращает
+    исключение для raise.
+    """
+    with _decode_cache_lock:
+        _reject_cache[key] = message
+    return exceptions.AuthenticationFailed(message)
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
@@ -59,46 +243,76 @@ class JWTAuthentication(authentication.BaseAuthentication):
     - что пароль пользователя не менялся с момента выдачи токена.
     """
 
-    keyword = "Bearer"
+    keyword = b"Bearer"
+    prefix = keyword + b" "
+    prefix_len = len(prefix)
 
     def authenticate(self, request):
-        auth_header = authentication.get_authorization_header(request).decode("utf-8")
+        # работаем с bytes: токен уходит в PyJWT без лишних decode/encode
+        auth_header = _GET_AUTH(request)
 
         if not auth_header:
             return None
 
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0] != self.keyword:
+        # "Bearer <token>": проверяем префикс и берём срез, без split()
+        if not auth_header.startswith(self.prefix):
+            return None
+
+        token = auth_header[self.prefix_len:].strip()
+        if not token or b" " in token:
             return None
+        key = _token_key(token)
 
-        token = parts[1]
+        with _decode_cache_lock:
+            rejected = _reject_cache.get(key)
+        if rejected is not None:
+            raise _AUTH_FAIL(rejected)
 
         try:
-            payload = decode_access_token(token)
-        except jwt.ExpiredSignatureError:
-            raise exceptions.AuthenticationFailed("Токен истёк")
-        except jwt.InvalidTokenError:
-            raise exceptions.AuthenticationFailed("Неверный токен")
+            payload = decode_access_token(token, key)
+        except _EXPIRED:
+            raise _reject(key, "Токен истёк")
+        except _INVALID:
+            raise _reject(key, "Неверный токен")
 
         user_id = payload.get("sub")
         if not user_id:
-            raise exceptions.AuthenticationFailed("Некорректный токен (нет sub)")
+            raise _AUTH_FAIL("Некорректный токен (нет sub)")
 
-        try:
-            user = User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            raise exceptions.AuthenticationFailed("Пользователь не найден")
+        cache_key = (user_id, payload.get("pwd_fp"))
+        with _user_cache_lock:
+            row = _user_cache.get(cache_key)
+
+        if row is None:
+            try:
+                user = User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                raise _reject(key, "Пользователь не найден")
+            row = tuple(getattr(user, attname) for attname in _USER_ATTNAMES)
+            with _user_cache_lock:
+                _user_cache[cache_key] = row
+        else:
+            user = User.from_db(User.objects.db, _USER_ATTNAMES, row)
+
+        # роль берём из кэша справочника, а не JOIN'ом; экземпляр в кэше
+        # общий для всех запросов, поэтому каждому пользователю — своя копия
+        role = Role.objects.get_cached(user.role_id)
+        if role is not None:
+            user.role = Role.from_db(
+                role._state.db, _ROLE_ATTNAMES,
+                tuple(getattr(role, attname) for attname in _ROLE_ATTNAMES),
+            )
 
         # Проверка отпечатка пароля
         token_pwd_fp = payload.get("pwd_fp")
         if not token_pwd_fp:
             # Токен без отпечатка пароля считаем некорректным
-            raise exceptions.AuthenticationFailed("Некорректный токен (нет pwd_fp)")
+            raise _AUTH_FAIL("Некорректный токен (нет pwd_fp)")
 
         current_pwd_fp = _password_fingerprint(user)
-        if token_pwd_fp != current_pwd_fp:
+        if not hmac.compare_digest(str(token_pwd_fp), current_pwd_fp):
             # Пароль менялся — токен больше не действителен
-            raise exceptions.AuthenticationFailed(
+            raise _AUTH_FAIL(
                 "Пароль был изменён. Авторизуйтесь снова."
             )
 
@@ -0,0 +1,21 @@
+# fuel/hashers.py
+from django.contrib.auth import hashers
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    bcrypt_sha256 с откалиброванной стоимостью.
+    rounds=11 даёт ~150–250 мс на хеш на типичном сервере — укладываемся
+    в бюджет входа (<500 мс), не тратя CPU впустую. Проверить на своём
+    железе: python manage.py calibrate_hasher
+    """
+    rounds = 11
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    pbkdf2_sha256 с уменьшенным числом итераций для новых хешей
+    (set_password(..., hasher='pbkdf2_sha256')). Старые хеши проверяются
+    с тем числом итераций, которое записано в самом хеше.
+    """
+    iterations = 150_000
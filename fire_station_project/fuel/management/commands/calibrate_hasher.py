@@ -0,0 +1,40 @@
+# fuel/management/commands/calibrate_hasher.py
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время make_password основным хешером и сообщает, "
+        "если оно отличается от PASSWORD_HASH_TARGET_MS больше чем в 2 раза."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="сколько раз хешировать (берём медиану)")
+
+    def handle(self, *args, **options):
+        hasher = get_hasher('default')
+        target_ms = getattr(settings, 'PASSWORD_HASH_TARGET_MS', 250)
+
+        timings = []
+        for _ in range(max(options['repeat'], 1)):
+            started = time.perf_counter()
+            make_password('calibration-password')
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        median_ms = timings[len(timings) // 2]
+
+        cost = getattr(hasher, 'rounds', None) or getattr(hasher, 'iterations', None)
+        self.stdout.write(
+            f"{hasher.algorithm} (стоимость={cost}): {median_ms:.0f} мс, цель {target_ms} мс"
+        )
+
+        if median_ms > target_ms * 2 or median_ms < target_ms / 2:
+            self.stderr.write(self.style.WARNING(
+                "Время хеширования отличается от цели больше чем в 2 раза — "
+                "подберите rounds/iterations в fuel/hashers.py"
+            ))
@@ -0,0 +1,75 @@
+# fuel/management/commands/recompute_totals.py
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from fuel.utils import queryset_chunks
+from fuel.models import (
+    PassengerCarWaybill, PassengerCarWaybillRecord,
+    FireTruckWaybill, FireTruckWaybillRecord,
+)
+
+
+# (путевой лист, запись, FK записи на путевой) для каждого вида машин
+KINDS = {
+    'passenger': (PassengerCarWaybill, PassengerCarWaybillRecord, 'passenger_car_waybill'),
+    'fire-truck': (FireTruckWaybill, FireTruckWaybillRecord, 'fire_truck_waybill'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает нормативный расход и остаток топлива в записях и "
+        "итоги путевых листов (например, после правки норм)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=[*KINDS, 'all'], default='all',
+                            help="какие путевые листы пересчитывать")
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="путевых листов за один проход")
+
+    def handle(self, *args, **options):
+        kinds = KINDS if options['kind'] == 'all' else [options['kind']]
+        batch_size = max(options['batch_size'], 1)
+        failed = 0
+
+        for kind in kinds:
+            waybill_model, record_model, fk_name = KINDS[kind]
+            total = 0
+
+            # пачками по путевым листам: в памяти не больше batch_size листов
+            for waybills in queryset_chunks(waybill_model.objects.all(), batch_size):
+                try:
+                    self._recalc(record_model, fk_name, waybills)
+                    total += len(waybills)
+                    continue
+                except ValidationError:
+                    pass
+
+                # в пачке есть лист, который не пересчитать (например, нет
+                # нормы) — проходим её по одному листу, остальные сохраняем
+                for waybill in waybills:
+                    try:
+                        self._recalc(record_model, fk_name, [waybill])
+                        total += 1
+                    except ValidationError as e:
+                        failed += 1
+                        self.stderr.write(
+                            f"{kind}: путевой лист {waybill.number} (id={waybill.pk}) "
+                            f"не пересчитан: {'; '.join(e.messages)}"
+                        )
+
+            self.stdout.write(f"{kind}: пересчитано путевых листов — {total}")
+
+        if failed:
+            raise CommandError(f"не пересчитано путевых листов: {failed}")
+
+    @staticmethod
+    def _recalc(record_model, fk_name, waybills):
+        with transaction.atomic():
+            record_model.bulk_recalc(
+                record_model.objects.filter(**{f'{fk_name}__in': waybills})
+            )
+            for waybill in waybills:
+                waybill.recalc_totals()
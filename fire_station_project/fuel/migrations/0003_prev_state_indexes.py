@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0002_firetruckwaybillrecord_driving_route'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruckwaybillrecord',
+            index=models.Index(fields=['deleted_at'], name='ftw_rec_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='odometerfuelfiretruck',
+            index=models.Index(fields=['car', '-date', '-id'], name='offt_car_prev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='odometerfuelpassengercar',
+            index=models.Index(fields=['car', '-date', '-id'], name='ofpc_car_prev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercarwaybillrecord',
+            index=models.Index(fields=['deleted_at'], name='pcw_rec_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0003_prev_state_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruckwaybillrecord',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='ftw_rec_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercarwaybillrecord',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='pcw_rec_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='user_alive_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0004_alive_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruck',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['number'], name='ftruck_number_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercar',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['number'], name='pcar_number_alive_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0005_car_number_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruckwaybill',
+            index=models.Index(fields=['car', 'date'], name='ftw_car_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercarwaybill',
+            index=models.Index(fields=['car', 'date'], name='pcw_car_date_idx'),
+        ),
+    ]
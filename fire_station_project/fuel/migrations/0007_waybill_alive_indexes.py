@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0006_waybill_car_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruckwaybill',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='ftw_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercarwaybill',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='pcw_alive_idx'),
+        ),
+    ]
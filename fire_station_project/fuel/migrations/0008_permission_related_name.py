@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0007_waybill_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='permission',
+            name='role',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='permission', to='fuel.role'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0008_permission_related_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='firetruckwaybill',
+            name='driver',
+            field=models.ForeignKey(help_text='водитель', on_delete=django.db.models.deletion.PROTECT, related_name='fire_truck_driver', to='fuel.user'),
+        ),
+        migrations.AlterField(
+            model_name='passengercarwaybill',
+            name='driver',
+            field=models.ForeignKey(help_text='водитель', on_delete=django.db.models.deletion.PROTECT, related_name='passenger_car_driver', to='fuel.user'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='users', to='fuel.role'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0009_protect_role_and_driver'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='firetruck',
+            name='ftruck_number_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='passengercar',
+            name='pcar_number_alive_idx',
+        ),
+        migrations.AlterField(
+            model_name='firetruck',
+            name='number',
+            field=models.CharField(help_text='гос. номер', max_length=9),
+        ),
+        migrations.AlterField(
+            model_name='firetruckwaybill',
+            name='number',
+            field=models.CharField(help_text='номер путевого листа', max_length=6),
+        ),
+        migrations.AlterField(
+            model_name='passengercar',
+            name='number',
+            field=models.CharField(help_text='гос. номер', max_length=9),
+        ),
+        migrations.AlterField(
+            model_name='passengercarwaybill',
+            name='number',
+            field=models.CharField(help_text='номер путевого листа', max_length=6),
+        ),
+        migrations.AlterField(
+            model_name='role',
+            name='name',
+            field=models.CharField(help_text='название', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='driver_license',
+            field=models.CharField(max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='login',
+            field=models.CharField(max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='phone',
+            field=models.CharField(max_length=12),
+        ),
+        migrations.AddConstraint(
+            model_name='firetruck',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('number',), name='ftruck_number_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='firetruckwaybill',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('number',), name='ftw_number_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='passengercar',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('number',), name='pcar_number_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='passengercarwaybill',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('number',), name='pcw_number_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='role',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('name',), name='role_name_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('login',), name='user_login_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('phone',), name='user_phone_alive_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('driver_license',), name='user_license_alive_uniq'),
+        ),
+    ]
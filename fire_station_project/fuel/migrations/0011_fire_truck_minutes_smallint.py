@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0010_alive_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='firetruckwaybillrecord',
+            name='time_with_pump',
+            field=models.PositiveSmallIntegerField(help_text='время работы с насосом, мин'),
+        ),
+        migrations.AlterField(
+            model_name='firetruckwaybillrecord',
+            name='time_without_pump',
+            field=models.PositiveSmallIntegerField(help_text='время работы без насоса, мин'),
+        ),
+    ]
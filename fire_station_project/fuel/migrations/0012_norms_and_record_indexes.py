@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0011_fire_truck_minutes_smallint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firetruckwaybillrecord',
+            index=models.Index(fields=['fire_truck_waybill', 'id'], name='ftw_rec_wb_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='normsfiretruck',
+            index=models.Index(fields=['car', 'season', '-date', '-id'], name='nft_car_season_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='normspassengercars',
+            index=models.Index(fields=['car', 'season', '-date', '-id'], name='npc_car_season_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passengercarwaybillrecord',
+            index=models.Index(fields=['passenger_car_waybill', 'id'], name='pcw_rec_wb_id_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0013_car_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='odometerfuelfiretruck',
+            name='offt_car_prev_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='odometerfuelpassengercar',
+            name='ofpc_car_prev_idx',
+        ),
+        migrations.AddIndex(
+            model_name='odometerfuelfiretruck',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['car', '-date', '-id'], include=('odometer', 'fuel'), name='offt_car_prev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='odometerfuelpassengercar',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['car', '-date', '-id'], include=('odometer', 'fuel'), name='ofpc_car_prev_idx'),
+        ),
+    ]
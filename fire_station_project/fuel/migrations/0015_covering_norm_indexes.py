@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0014_covering_odometer_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='normsfiretruck',
+            name='nft_car_season_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='normspassengercars',
+            name='npc_car_season_idx',
+        ),
+        migrations.AddIndex(
+            model_name='normsfiretruck',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['car', 'season', '-date', '-id'], include=('km_norm', 'with_pump_norm', 'without_pump_norm'), name='nft_car_season_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='normspassengercars',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['car', 'season', '-date', '-id'], include=('city_norm', 'area_norm'), name='npc_car_season_idx'),
+        ),
+    ]
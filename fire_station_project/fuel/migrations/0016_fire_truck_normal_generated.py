@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-15 12:00
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel', '0015_covering_norm_indexes'),
+    ]
+
+    # обычную колонку в генерируемую не переделать (ALTER не умеет) —
+    # удаляем и добавляем заново, значения БД посчитает сама
+    operations = [
+        migrations.RemoveField(
+            model_name='firetruckwaybillrecord',
+            name='fuel_used_normal',
+        ),
+        migrations.AddField(
+            model_name='firetruckwaybillrecord',
+            name='fuel_used_normal',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('fuel_used_by_distance'), '+', models.F('fuel_used_with_pump')), '+', models.F('fuel_used_without_pump')), help_text='израсходовано по норме, л', output_field=models.DecimalField(decimal_places=3, max_digits=7)),
+        ),
+    ]
@@ -1,18 +1,66 @@
-from django.db import models, transaction
-from django.db.models import Sum
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Now
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password, check_password, identify_hasher
+from django.contrib.auth.hashers import make_password, check_password, get_hashers
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from datetime import date
+from functools import cache
+from contextlib import contextmanager
+from contextvars import ContextVar
+from weakref import WeakValueDictionary
+import hashlib
+import hmac
+import threading
+
+from cachetools import TTLCache
 
 
 # --- Мягкое удаление ---
 
+# ContextVar, а не threading.local: у каждой asyncio-задачи свой контекст,
+# и метка одного блока не попадает в удаления соседней задачи того же потока
+_soft_delete_clock = ContextVar('soft_delete_clock', default=None)
+
+
+@contextmanager
+def soft_delete_clock(when=None):
+    """
+    Одна метка deleted_at на все мягкие удаления внутри блока:
+
+        with soft_delete_clock() as now:
+            waybill.delete()
+            waybill.records.all().delete()
+
+    Вложенный вызов отдаёт метку внешнего блока.
+    """
+    current = _soft_delete_clock.get()
+    if current is not None:
+        yield current
+        return
+
+    now = when or timezone.now()
+    token = _soft_delete_clock.set(now)
+    try:
+        yield now
+    finally:
+        _soft_delete_clock.reset(token)
+
+
+def _soft_delete_now():
+    """Метка из soft_delete_clock() или None, если блок не открыт."""
+    return _soft_delete_clock.get()
+
+
 class SoftDeleteQuerySet(models.QuerySet):
-    def delete(self):
-        return super().update(deleted_at=timezone.now())
+    def delete(self, when=None):
+        # уже удалённые строки повторно не переписываем;
+        # без явной метки время берём из БД (NOW()), одно на весь UPDATE
+        when = when or _soft_delete_now() or Now()
+        return super().filter(deleted_at__isnull=True).update(deleted_at=when)
 
     def hard_delete(self):
         return super().delete()
@@ -24,56 +72,455 @@ class SoftDeleteQuerySet(models.QuerySet):
         return self.filter(deleted_at__isnull=False)
 
 class SoftDeleteManager(models.Manager):
+    queryset_class = SoftDeleteQuerySet
+
     def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).alive()
+        # то же, что .alive(), но без лишнего клона: свежий QuerySet ещё
+        # ни с кем не разделён, поэтому условие кладём прямо в его query
+        qs = self.queryset_class(self.model, using=self._db)
+        qs.query.add_q(Q(deleted_at__isnull=True))
+        return qs
 
     def all_with_deleted(self):
-        return SoftDeleteQuerySet(self.model, using=self._db)
+        return self.queryset_class(self.model, using=self._db)
 
     def only_deleted(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).dead()
-
-class SoftDeleteAllManager(models.Manager):
-    def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db)
+        return self.queryset_class(self.model, using=self._db).dead()
+
+class _AllObjects:
+    """
+    Model.all_objects — QuerySet по всем строкам, включая удалённые.
+    Отдельный менеджер для этого не нужен: отдаём objects.all_with_deleted()
+    в момент обращения.
+    """
+    def __get__(self, instance, owner):
+        if instance is not None:
+            raise AttributeError("all_objects доступен только через класс модели")
+        return owner.objects.all_with_deleted()
+
+@cache
+def _soft_delete_sql(model, alias) -> str:
+    """
+    UPDATE для мягкого удаления одной строки. Собирается один раз на
+    модель и БД, чтобы не строить SQLUpdateCompiler на каждое удаление.
+    """
+    qn = connections[alias].ops.quote_name
+    deleted_at = qn(model._meta.get_field('deleted_at').column)
+    return (
+        f"UPDATE {qn(model._meta.db_table)} SET {deleted_at} = %s "
+        f"WHERE {qn(model._meta.pk.column)} = %s AND {deleted_at} IS NULL"
+    )
 
 class SoftDeleteModel(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = SoftDeleteManager()
-    all_objects = SoftDeleteAllManager()
+    all_objects = _AllObjects()
+
+    # True — мягкое удаление идёт через save(update_fields=['deleted_at']),
+    # потому что модели нужны его побочные эффекты (пересчёт итогов,
+    # post_save-сигналы сброса кэшей). Иначе — один UPDATE без save().
+    soft_delete_via_save = False
 
     class Meta:
         abstract = True
 
     def delete(self, using=None, keep_parents=False):
-        self.deleted_at = timezone.now()
-        self.save(update_fields=['deleted_at'])
+        """
+        Мягкое удаление. Возвращает, как и Model.delete(),
+        (число строк, {label модели: число строк}).
+        """
+        # уже удалённую запись повторно не сохраняем
+        if self.deleted_at is not None:
+            return 0, {}
+        self.deleted_at = _soft_delete_now() or timezone.now()
+        if self.soft_delete_via_save:
+            self.save(update_fields=['deleted_at'])
+            deleted = 1
+        else:
+            model = type(self)
+            alias = using or router.db_for_write(model, instance=self)
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                cursor.execute(_soft_delete_sql(model, alias), [
+                    connection.ops.adapt_datetimefield_value(self.deleted_at),
+                    self.pk,
+                ])
+                # 0, если строку уже пометил кто-то другой
+                deleted = cursor.rowcount
+        return deleted, ({self._meta.label: deleted} if deleted else {})
 
     def hard_delete(self, using=None, keep_parents=False):
         return super().delete(using=using, keep_parents=keep_parents)
 
 
+# --- Пароли ---
+
+@cache
+def _hash_prefixes() -> tuple:
+    """
+    Префиксы вида 'pbkdf2_sha256$' для всех PASSWORD_HASHERS.
+    Считаются один раз; по ним User.save отличает хеш от сырого пароля.
+    """
+    return tuple(h.algorithm + '$' for h in get_hashers())
+
+
+# Успешные проверки пароля на короткое окно: повторный вход того же
+# пользователя в течение минуты не гоняет PBKDF2/bcrypt заново.
+# Ключ — HMAC(SECRET_KEY, пароль) и текущий хеш: сырой пароль в памяти
+# не держим, а смена пароля (новый хеш) сама делает старые записи
+# недостижимыми. Неудачные проверки не кэшируем — перебор должен
+# оставаться дорогим.
+PASSWORD_CHECK_CACHE_TTL_SECONDS = 60
+_password_checks = TTLCache(maxsize=4096, ttl=PASSWORD_CHECK_CACHE_TTL_SECONDS)
+_password_checks_lock = threading.Lock()
+
+
+def _password_check_key(raw_password: str, encoded: str) -> tuple:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), raw_password.encode(), hashlib.sha256
+    ).digest()
+    return digest, encoded
+
+
+# --- Целочисленная арифметика топлива ---
+# Все объёмы/нормы у нас с decimal_places=3, поэтому в расчётах записей
+# считаем в целых тысячных (мл, мл/км) — точно и без Decimal на каждой
+# операции; в Decimal переводим только при записи.
+
+# ноль в формате наших колонок; Decimal неизменяем, поэтому один объект
+# на весь модуль — для default, валидаторов и выражений
+ZERO = Decimal('0.000')
+
+
+def _to_milli(value: Decimal) -> int:
+    # Decimal(...) — чтобы принять и целые (default=0 у fuel_refueled)
+    return int(Decimal(value).scaleb(3))
+
+
+def _from_milli(value: int) -> Decimal:
+    return Decimal(value).scaleb(-3)
+
+
+# --- Отложенный пересчёт агрегатов путевых листов ---
+
+_bulk_state = threading.local()
+
+
+@contextmanager
+def bulk_mode():
+    """
+    Массовое сохранение записей путевых листов:
+
+        with transaction.atomic(), bulk_mode():
+            for rec in records:
+                rec.save()
+
+    Внутри блока save() записей не вызывает recalc_totals() на каждую
+    запись — путевые листы копятся, и при выходе каждый пересчитывается
+    один раз. Снимки одометра/топлива по-прежнему пишутся сразу:
+    по ним следующая запись берёт стартовые значения.
+    """
+    if getattr(_bulk_state, 'waybills', None) is not None:
+        # вложенный вызов — всё досчитает внешний блок
+        yield
+        return
+
+    _bulk_state.waybills = {}
+    try:
+        yield
+        pending = list(_bulk_state.waybills.values())
+    finally:
+        _bulk_state.waybills = None
+
+    for waybill in pending:
+        waybill.recalc_totals()
+
+
+class _PendingRecalc:
+    """
+    Пересчёт одного путевого листа, ожидающий коммита. Все колбэки
+    on_commit по этому листу в транзакции делят один экземпляр: первый
+    пересчитывает, остальные видят done.
+    """
+    __slots__ = ('waybill', 'done', '__weakref__')
+
+    def __init__(self, waybill):
+        self.waybill = waybill
+        self.done = False
+
+    def __call__(self):
+        if not self.done:
+            self.done = True
+            self.waybill.recalc_totals()
+
+
+# ожидающие пересчёты по (БД, модель, pk) — на поток, как и соединения.
+# Держат их только колбэки on_commit: после коммита или отката Django
+# очищает очередь, и запись отсюда пропадает сама.
+_pending_recalcs = threading.local()
+
+
+def _recalc_or_defer(waybill) -> None:
+    """
+    Пересчитать агрегаты путевого листа после коммита транзакции
+    (transaction.on_commit) или, внутри bulk_mode(), при выходе из блока.
+
+    Несколько save() записей одного листа в одной транзакции дают один
+    пересчёт. Вне транзакции пересчитываем сразу. Колбэк ставим на каждый
+    вызов: при откате savepoint'а Django выбрасывает колбэки, поставленные
+    внутри него, и лист не должен остаться без пересчёта.
+    """
+    key = (type(waybill), waybill.pk)
+    pending = getattr(_bulk_state, 'waybills', None)
+    if pending is not None:
+        pending[key] = waybill
+        return
+
+    using = waybill._state.db or router.db_for_write(type(waybill))
+    if not transaction.get_connection(using).in_atomic_block:
+        waybill.recalc_totals()
+        return
+
+    holders = getattr(_pending_recalcs, 'holders', None)
+    if holders is None:
+        holders = _pending_recalcs.holders = WeakValueDictionary()
+    key = (using, *key)
+    holder = holders.get(key)
+    if holder is None or holder.done:
+        holder = holders[key] = _PendingRecalc(waybill)
+    else:
+        holder.waybill = waybill
+    transaction.on_commit(holder, using=using)
+
+
+# --- Агрегаты путевого листа одним UPDATE ---
+
+TOTAL_FIELDS = (
+    'upon_issuance',
+    'total_spent',
+    'total_received',
+    'required_by_norm',
+    'availability_upon_delivery',
+    'savings',
+    'overrun',
+)
+
+
+@cache
+def _totals_update(record_model, fk_name, state_model):
+    """
+    Выражения для одного UPDATE агрегатов путевого листа:
+
+        Waybill._base_manager.filter(pk=wb.pk).update(
+            **_totals_update(Record, 'waybill_fk', OdometerFuel...)
+        )
+
+    Суммы по живым записям, топливо при выдаче (последний снимок по
+    машине на дату путевого) и остаток при сдаче считаются в БД.
+    SET не видит уже присвоенных значений, поэтому подзапросы для
+    экономии/перерасхода повторяются — всё в том же запросе.
+    Выражения собираются один раз на модель: update() их не меняет,
+    а копирует при разборе.
+    """
+    zero = Value(ZERO)
+    out = DecimalField(max_digits=6, decimal_places=3)
+    records = record_model.objects.filter(**{fk_name: OuterRef('pk')})
+
+    def total(field):
+        return Coalesce(
+            Subquery(
+                records.order_by()
+                .values(fk_name)
+                .annotate(s=Sum(field))
+                .values('s')
+            ),
+            zero,
+            output_field=out,
+        )
+
+    upon_issuance = Coalesce(
+        Subquery(
+            state_model.objects
+            .filter(car=OuterRef('car_id'), date__lte=OuterRef('date'))
+            .order_by('-date', '-id')
+            .values('fuel')[:1]
+        ),
+        zero,
+        output_field=out,
+    )
+    spent = total('fuel_used')
+    required = total('fuel_used_normal')
+
+    return {
+        'upon_issuance': upon_issuance,
+        'total_spent': spent,
+        'total_received': total('fuel_refueled'),
+        'required_by_norm': required,
+        'availability_upon_delivery': Coalesce(
+            Subquery(records.order_by('-id').values('fuel_on_return')[:1]),
+            upon_issuance,
+            output_field=out,
+        ),
+        'savings': Greatest(required - spent, zero, output_field=out),
+        'overrun': Greatest(spent - required, zero, output_field=out),
+    }
+
+
+class WaybillTotalsMixin:
+    """
+    Пересчёт агрегатов путевого листа — общий для легковых и ПА.
+    Модели записей и снимков одометра/топлива берутся из обратных
+    связей records и odometer_fuel_states.
+    """
+
+    def _totals_models(self):
+        records = self._meta.get_field('records')
+        states = self._meta.get_field('odometer_fuel_states')
+        return records.related_model, records.field.name, states.related_model
+
+    def recalc_totals(self, save=True):
+        """
+        Пересчитать агрегатные поля на основе записей и начального состояния.
+
+        С save=True всё считается и пишется одним UPDATE в БД
+        (recalc_totals_sql); save=False заполняет поля в памяти — теми же
+        выражениями, одним SELECT по строке путевого (по сохранённым
+        машине и дате).
+        """
+        if save:
+            self.recalc_totals_sql()
+            return
+
+        exprs = _totals_update(*self._totals_models())
+        row = (
+            type(self)._base_manager
+            .filter(pk=self.pk)
+            .annotate(**{f'calc_{name}': expr for name, expr in exprs.items()})
+            .values(*(f'calc_{name}' for name in TOTAL_FIELDS))
+            .get()
+        )
+        for name in TOTAL_FIELDS:
+            # через тысячные — к трём знакам, как в колонке
+            setattr(self, name, _from_milli(_to_milli(row[f'calc_{name}'])))
+
+    def recalc_totals_sql(self):
+        type(self)._base_manager.filter(pk=self.pk).update(
+            **_totals_update(*self._totals_models())
+        )
+        # значения в объекте устарели: делаем поля отложенными — при
+        # обращении подтянутся из БД, а save() без update_fields их не
+        # перезапишет (Django сохраняет только загруженные поля)
+        for name in TOTAL_FIELDS:
+            self.__dict__.pop(name, None)
+
+
+# --- Загрузка путевого листа для save() записей ---
+
+def _is_soft_delete_save(save_kwargs) -> bool:
+    """save(update_fields=['deleted_at']) из SoftDeleteModel.delete."""
+    update_fields = save_kwargs.get('update_fields')
+    return update_fields is not None and set(update_fields) == {'deleted_at'}
+
+
+def _load_waybill_with_car(record, field_name):
+    """
+    Гарантирует, что у записи загружен путевой лист вместе с машиной:
+    _fill_start_values, _apply_norms и recalc_totals обращаются к
+    waybill.car, и без этого каждое первое обращение — отдельный SELECT.
+    Если оба объекта уже в кэше (select_related снаружи) — запросов нет.
+    """
+    field = record._meta.get_field(field_name)
+    if field.is_cached(record):
+        waybill = getattr(record, field_name)
+        if waybill._meta.get_field('car').is_cached(waybill):
+            return waybill
+
+    waybill = (
+        field.related_model._base_manager
+        .select_related('car')
+        .get(pk=getattr(record, field.attname))
+    )
+    setattr(record, field_name, waybill)
+    return waybill
+
+
+def _loaded_relations(instance, *names) -> list:
+    """
+    FK из names, объекты которых уже загружены в instance (их нашли
+    сериализатор или форма). full_clean() проверяет существование
+    связанной строки отдельным SELECT'ом — для них это лишний запрос.
+    """
+    loaded = []
+    for name in names:
+        field = instance._meta.get_field(name)
+        if getattr(instance, field.attname) is not None and field.is_cached(instance):
+            loaded.append(name)
+    return loaded
+
+
 # --- Основные таблицы ---
 
 # --- Общие таблицы ---
+
+# Роли — маленький, почти неизменяемый справочник: держим живые роли
+# в памяти процесса. Сигналы на Role (signals.py) сбрасывают кэш в текущем
+# процессе, TTL — чтобы правки из других воркеров тоже доезжали.
+ROLES_CACHE_TTL_SECONDS = 60
+_roles_cache = TTLCache(maxsize=1, ttl=ROLES_CACHE_TTL_SECONDS)
+_roles_cache_lock = threading.Lock()
+
+
+class RoleManager(SoftDeleteManager):
+    def cached_by_id(self) -> dict:
+        """Карта id -> Role по всем живым ролям, одним запросом на TTL."""
+        with _roles_cache_lock:
+            mapping = _roles_cache.get('all')
+            if mapping is None:
+                mapping = {role.pk: role for role in self.get_queryset()}
+                _roles_cache['all'] = mapping
+            return mapping
+
+    def get_cached(self, pk):
+        """Живая роль по id из кэша (или None)."""
+        return self.cached_by_id().get(pk)
+
+    def invalidate_cache(self) -> None:
+        with _roles_cache_lock:
+            _roles_cache.clear()
+
+
 class Role(SoftDeleteModel):
+    # удаление через save(): post_save сбрасывает кэш прав и ролей
+    soft_delete_via_save = True
+
+    objects = RoleManager()
+
     name = models.CharField(
         max_length=50,
-        unique=True,
         null=False,
         help_text="название"
     )
 
+    class Meta:
+        constraints = [
+            # уникальность только среди живых строк: после мягкого удаления
+            # имя/номер/логин можно занять снова (так же у остальных моделей)
+            models.UniqueConstraint(fields=['name'], condition=Q(deleted_at__isnull=True),
+                                    name='role_name_alive_uniq'),
+        ]
+
     def __str__(self):
         return self.name
 
 class Permission(SoftDeleteModel):
+    soft_delete_via_save = True
+
     role = models.OneToOneField(
         Role,
         on_delete=models.CASCADE,
         null=False,
-        related_name="role"
+        related_name="permission"
     )
 
     can_use_mobile_booking = models.BooleanField(default=False)
@@ -129,7 +576,28 @@ class Permission(SoftDeleteModel):
     can_download_passenger_cars_reports = models.BooleanField(default=False)
     view_passenger_cars_reports = models.BooleanField(default=False)
 
+class UserQuerySet(SoftDeleteQuerySet):
+    def delete(self, when=None):
+        # массовое удаление идёт UPDATE'ом без сигналов, поэтому кэш
+        # аутентификации сбрасываем сами (как drop_cached_user для save())
+        from .auth import invalidate_user_cache
+        pks = list(self.filter(deleted_at__isnull=True).values_list('pk', flat=True))
+        deleted = super().delete(when=when)
+        for pk in pks:
+            invalidate_user_cache(pk)
+        return deleted
+
+
+class UserManager(SoftDeleteManager):
+    queryset_class = UserQuerySet
+
+
 class User(SoftDeleteModel):
+    # удаление через save(): post_save сбрасывает кэш аутентификации
+    soft_delete_via_save = True
+
+    objects = UserManager()
+
     name = models.CharField(
         max_length=40,
         null=False
@@ -147,7 +615,6 @@ class User(SoftDeleteModel):
 
     login = models.CharField(
         max_length=15,
-        unique=True,
         null=False
     )
     
@@ -158,42 +625,98 @@ class User(SoftDeleteModel):
 
     phone = models.CharField(
         max_length=12,
-        unique=True,
         null=False
     )
 
     driver_license = models.CharField(
         max_length=10,
-        unique=True,
         null=True
     )
 
+    # PROTECT: hard_delete() роли не должен каскадом удалять пользователей
+    # (и дальше их путевые листы с записями)
     role = models.ForeignKey(
         Role,
-        on_delete=models.CASCADE,
+        on_delete=models.PROTECT,
         null=False,
         related_name='users'
     )
 
+    class Meta:
+        indexes = [
+            # частичный индекс только по живым пользователям
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='user_alive_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['login'], condition=Q(deleted_at__isnull=True),
+                                    name='user_login_alive_uniq'),
+            models.UniqueConstraint(fields=['phone'], condition=Q(deleted_at__isnull=True),
+                                    name='user_phone_alive_uniq'),
+            models.UniqueConstraint(fields=['driver_license'], condition=Q(deleted_at__isnull=True),
+                                    name='user_license_alive_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.surname} {self.name} {self.last_name} ({self.login})"
 
+    @property
+    def perms(self):
+        """
+        Permission роли пользователя (или None) из общей карты прав —
+        проверки прав внутри запроса в БД не ходят.
+        """
+        # permissions импортирует models, поэтому импорт здесь
+        from .permissions import permission_for_role
+        return permission_for_role(self.role_id)
+
     # ---------- работа с паролем ----------
 
-    def set_password(self, raw_password: str) -> None:
-        self.password = make_password(raw_password)
+    # Последнее значение password, про которое точно известно, что это хеш
+    # (загружено из БД, выставлено set_password() или уже сохранено).
+    # Пока password с ним совпадает, save() его не разбирает.
+    _hashed_password = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._hashed_password = instance.__dict__.get('password')
+        return instance
+
+    def set_password(self, raw_password: str, hasher: str = 'default') -> None:
+        # hasher можно указать явно (например, для массового создания
+        # пользователей админом), иначе — первый из PASSWORD_HASHERS
+        self.password = make_password(raw_password, hasher=hasher)
+        self._hashed_password = self.password
 
     def check_password(self, raw_password: str) -> bool:
-        return check_password(raw_password, self.password)
+        if not raw_password or not self.password:
+            return check_password(raw_password, self.password)
+
+        key = _password_check_key(raw_password, self.password)
+        with _password_checks_lock:
+            if key in _password_checks:
+                return True
+
+        if not check_password(raw_password, self.password):
+            return False
+        with _password_checks_lock:
+            _password_checks[key] = True
+        return True
 
     def save(self, *args, **kwargs):
-        if self.password:
-            try:
-                identify_hasher(self.password)
-            except ValueError:
-                self.password = make_password(self.password)
+        update_fields = kwargs.get('update_fields')
+        password_touched = update_fields is None or 'password' in update_fields
+        password = self.password
+
+        # пароль менялся в обход set_password(): уже готовый хеш узнаём
+        # по префиксу алгоритма, иначе — хешируем
+        if (password_touched and password and password != self._hashed_password
+                and not password.startswith(_hash_prefixes())):
+            self.password = make_password(password)
 
         super().save(*args, **kwargs)
+        self._hashed_password = self.password
 
 class Season(models.TextChoices):
     WINTER = 'winter', 'Зима'
@@ -209,7 +732,6 @@ class PassengerCar(SoftDeleteModel):
     number = models.CharField(
         max_length=9,
         null=False,
-        unique=True,
         help_text="гос. номер"
     )
 
@@ -223,9 +745,47 @@ class PassengerCar(SoftDeleteModel):
         help_text="модель"
     )
 
+    class Meta:
+        indexes = [
+            # частичный индекс только по живым машинам
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='pcar_alive_idx'),
+        ]
+        constraints = [
+            # частичный уникальный индекс по номерам живых машин
+            # (заодно служит выборкам/сортировке без удалённых)
+            models.UniqueConstraint(fields=['number'], condition=Q(deleted_at__isnull=True),
+                                    name='pcar_number_alive_uniq'),
+        ]
+
     def __str__(self):
         return f"легковой автомобиль с гос. номером {self.number} "  
 
+class NormsManager(SoftDeleteManager):
+    def latest_per_car(self, season, date_lte, car_ids=None) -> dict:
+        """
+        Действующие нормы на дату одним запросом: {car_id: норма}.
+        Для массовых пересчётов — вместо .order_by('-date', '-id').first()
+        на каждую запись. car_ids ограничивает выборку нужными машинами.
+        """
+        qs = self.filter(season=season, date__lte=date_lte)
+        if car_ids is not None:
+            qs = qs.filter(car_id__in=car_ids)
+
+        if connections[qs.db].features.can_distinct_on_fields:
+            # Postgres: DISTINCT ON (car_id) по тому же порядку
+            qs = qs.order_by('car_id', '-date', '-id').distinct('car_id')
+        else:
+            latest = (
+                self.filter(car=OuterRef('car'), season=season, date__lte=date_lte)
+                .order_by('-date', '-id')
+                .values('pk')[:1]
+            )
+            qs = qs.filter(pk=Subquery(latest))
+
+        return {norm.car_id: norm for norm in qs}
+
+
 class NormsPassengerCars(SoftDeleteModel):
     car = models.ForeignKey(
         PassengerCar,
@@ -245,7 +805,7 @@ class NormsPassengerCars(SoftDeleteModel):
         decimal_places=3,
         null=False,
         help_text="норма на 1 км по городу, л/км",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     area_norm = models.DecimalField(
@@ -253,7 +813,7 @@ class NormsPassengerCars(SoftDeleteModel):
         decimal_places=3,
         null=False,
         help_text="норма на 1 км по области, л/км",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     date = models.DateField(
@@ -262,15 +822,26 @@ class NormsPassengerCars(SoftDeleteModel):
         help_text="дата утверждения нормы",
     )
 
+    objects = NormsManager()
+
+    class Meta:
+        indexes = [
+            # действующая норма: filter(car=..., season=..., date__lte=...)
+            # .order_by('-date', '-id') — диапазон по индексу с LIMIT 1;
+            # только живые строки, сами нормы лежат в индексе (index-only)
+            models.Index(fields=['car', 'season', '-date', '-id'],
+                         include=['city_norm', 'area_norm'],
+                         condition=Q(deleted_at__isnull=True), name='npc_car_season_idx'),
+        ]
+
     def __str__(self):
         return f"Норма {self.car.number} {self.season} от {self.date}"
 
-class PassengerCarWaybill(SoftDeleteModel):
+class PassengerCarWaybill(WaybillTotalsMixin, SoftDeleteModel):
     number = models.CharField(
         max_length=6,
         null=False,
         help_text="номер путевого листа",
-        unique=True,
     )
 
     car = models.ForeignKey(
@@ -280,9 +851,10 @@ class PassengerCarWaybill(SoftDeleteModel):
         related_name="waybills",
     )
 
+    # PROTECT: путевые листы водителя не удаляются вместе с ним
     driver = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        on_delete=models.PROTECT,
         related_name="passenger_car_driver",
         null=False,
         help_text="водитель"
@@ -315,9 +887,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="наличие ГСМ при выдаче, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     total_spent = models.DecimalField(
@@ -325,9 +897,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="всего израсходовано, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     total_received = models.DecimalField(
@@ -335,9 +907,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="всего получено (заправки), л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     required_by_norm = models.DecimalField(
@@ -345,9 +917,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="положено по норме, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     availability_upon_delivery = models.DecimalField(
@@ -355,9 +927,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="наличие при сдаче, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     savings = models.DecimalField(
@@ -365,9 +937,9 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="экономия, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     overrun = models.DecimalField(
@@ -375,69 +947,30 @@ class PassengerCarWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="перерасход, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
+    class Meta:
+        indexes = [
+            # отчёты и списки по машине за период: car_id = ... AND date BETWEEN ...
+            models.Index(fields=['car', 'date'], name='pcw_car_date_idx'),
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='pcw_alive_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['number'], condition=Q(deleted_at__isnull=True),
+                                    name='pcw_number_alive_uniq'),
+        ]
+
     def __str__(self):
         return f"Путевой лист {self.car.number} от {self.date}"
 
-    # ---- пересчёт агрегатов ----
-
-    def recalc_totals(self, save=True):
-        """
-        Пересчитать агрегатные поля на основе записей и начального состояния.
-        """
-        # начальное топливо (берём последнюю запись по машине на дату путевого)
-        start_state = (
-            OdometerFuelPassengerCar.objects
-            .filter(car=self.car, date__lte=self.date)
-            .order_by('-date', '-id')
-            .first()
-        )
-        self.upon_issuance = start_state.fuel if start_state else Decimal('0.000')
-
-        qs = self.records.all()
-
-        agg = qs.aggregate(
-            total_spent=Sum('fuel_used'),
-            total_received=Sum('fuel_refueled'),
-            required_by_norm=Sum('fuel_used_normal'),
-        )
-
-        self.total_spent = agg['total_spent'] or Decimal('0.000')
-        self.total_received = agg['total_received'] or Decimal('0.000')
-        self.required_by_norm = agg['required_by_norm'] or Decimal('0.000')
-
-        last_record = qs.order_by('-id').first()
-        self.availability_upon_delivery = (
-            last_record.fuel_on_return if last_record else self.upon_issuance
-        )
-
-        # экономия / перерасход
-        diff = self.required_by_norm - self.total_spent
-        if diff >= 0:
-            self.savings = diff
-            self.overrun = Decimal('0.000')
-        else:
-            self.savings = Decimal('0.000')
-            self.overrun = -diff
-
-        if save:
-            self.save(
-                update_fields=[
-                    'upon_issuance',
-                    'total_spent',
-                    'total_received',
-                    'required_by_norm',
-                    'availability_upon_delivery',
-                    'savings',
-                    'overrun',
-                ]
-            )
-
 class PassengerCarWaybillRecord(SoftDeleteModel):
+    # удаление через save(): нужен пересчёт итогов путевого
+    soft_delete_via_save = True
+
     passenger_car_waybill = models.ForeignKey(
         PassengerCarWaybill,
         on_delete=models.CASCADE,
@@ -479,7 +1012,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         decimal_places=3,
         default=0,
         help_text="заправка, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used = models.DecimalField(
@@ -487,7 +1020,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         decimal_places=3,
         null=False,
         help_text="израсходовано топлива, л (фактически)",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     # авто-поля (как раньше)
@@ -504,7 +1037,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="топливо перед выездом, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     odometer_before = models.PositiveIntegerField(
@@ -527,7 +1060,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="израсходовано по городу, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used_area = models.DecimalField(
@@ -536,7 +1069,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="израсходовано по области, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_on_return = models.DecimalField(
@@ -545,7 +1078,7 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="остаток топлива при возвращении, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used_normal = models.DecimalField(
@@ -554,100 +1087,194 @@ class PassengerCarWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="израсходовано по норме, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            # мягкое удаление: каждый запрос менеджера фильтрует deleted_at
+            models.Index(fields=['deleted_at'], name='pcw_rec_deleted_idx'),
+            # записи путевого в порядке ordering = ['id']
+            models.Index(fields=['passenger_car_waybill', 'id'], name='pcw_rec_wb_id_idx'),
+            # частичный индекс только по живым строкам
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='pcw_rec_alive_idx'),
+        ]
 
     # ------------ внутренняя логика ------------
 
-    def _fill_start_values(self):
+    def _load_start_state(self):
         """
-        odometer_before / fuel_before_departure берём из ПОСЛЕДНЕЙ записи
-        OdometerFuelPassengerCar по этой машине.
+        Последние показания одометра/топлива по машине и действующая норма
+        (по сезону и дате путевого) — одним запросом: четыре скалярных
+        подзапроса от строки машины вместо двух отдельных .first().
         """
         wb = self.passenger_car_waybill
-        car = wb.car
 
         last_state = (
             OdometerFuelPassengerCar.objects
-            .filter(car=car)
+            .filter(car_id=wb.car_id)
             .order_by('-date', '-id')
-            .first()
         )
-        if not last_state:
+        norm = (
+            NormsPassengerCars.objects
+            .filter(
+                car_id=wb.car_id,
+                season=wb.norm_season,
+                date__lte=wb.date,
+            )
+            .order_by('-date', '-id')
+        )
+        return (
+            PassengerCar._base_manager
+            .filter(pk=wb.car_id)
+            .annotate(
+                last_odometer=Subquery(last_state.values('odometer')[:1]),
+                last_fuel=Subquery(last_state.values('fuel')[:1]),
+                city_norm=Subquery(norm.values('city_norm')[:1]),
+                area_norm=Subquery(norm.values('area_norm')[:1]),
+            )
+            .values_list('last_odometer', 'last_fuel', 'city_norm', 'area_norm', named=True)
+            .get()
+        )
+
+    def _fill_start_values(self, state):
+        """
+        odometer_before / fuel_before_departure берём из ПОСЛЕДНЕЙ записи
+        OdometerFuelPassengerCar по этой машине.
+        """
+        if state.last_odometer is None:
+            car = self.passenger_car_waybill.car
             raise ValidationError(
                 f"Не найдены последние показания одометра/топлива для {car.number}. "
                 "Сначала создайте запись в OdometerFuelPassengerCar."
             )
 
-        self.odometer_before = last_state.odometer
-        self.fuel_before_departure = last_state.fuel
+        self.odometer_before = state.last_odometer
+        self.fuel_before_departure = state.last_fuel
 
-    def _apply_norms(self):
+    def _apply_norms(self, state):
         """
         Тот же расчёт, который у тебя уже был:
         - distance_total_km = distance_city_km + distance_area_km
         - odometer_after = odometer_before + distance_total_km
         - fuel_used_city/area по нормам из NormsPassengerCars (по сезону и дате)
         """
-        wb = self.passenger_car_waybill
-        car = wb.car
-
-        from .models import NormsPassengerCars  # локальный импорт, если нужно
-
-        norm = (
-            NormsPassengerCars.objects
-            .filter(
-                car=car,
-                season=wb.norm_season,
-                date__lte=wb.date,
-            )
-            .order_by('-date', '-id')
-            .first()
-        )
-        if not norm:
+        if state.city_norm is None:
+            wb = self.passenger_car_waybill
             raise ValidationError(
-                f"Не найдена норма для {car.number}, сезон={wb.norm_season}"
+                f"Не найдена норма для {wb.car.number}, сезон={wb.norm_season}"
             )
 
         self.distance_total_km = self.distance_city_km + self.distance_area_km
         self.odometer_after = self.odometer_before + self.distance_total_km
 
-        self.fuel_used_city = Decimal(self.distance_city_km) * norm.city_norm
-        self.fuel_used_area = Decimal(self.distance_area_km) * norm.area_norm
-        self.fuel_used_normal = (self.fuel_used_city or 0) + (self.fuel_used_area or 0)
+        used_city = self.distance_city_km * _to_milli(state.city_norm)
+        used_area = self.distance_area_km * _to_milli(state.area_norm)
+        self.fuel_used_city = _from_milli(used_city)
+        self.fuel_used_area = _from_milli(used_area)
+        self.fuel_used_normal = _from_milli(used_city + used_area)
 
     def _calc_fuel_on_return(self):
         """
         Остаток топлива = до выезда - фактический расход + заправка.
         """
-        self.fuel_on_return = (
-            (self.fuel_before_departure or Decimal('0.000'))
-            - (self.fuel_used or Decimal('0.000'))
-            + (self.fuel_refueled or Decimal('0.000'))
+        self.fuel_on_return = _from_milli(
+            _to_milli(self.fuel_before_departure or 0)
+            - _to_milli(self.fuel_used)
+            + _to_milli(self.fuel_refueled)
         )
 
+    @classmethod
+    def bulk_recalc(cls, qs, batch_size=1000):
+        """
+        Массовый пересчёт нормативных полей и остатка топлива для записей qs
+        (для команд/импорта; обычный save() не трогаем).
+        Норма ищется один раз на путевой лист, арифметика — в целых тысячных,
+        запись — bulk_update пачками.
+        """
+        records = list(qs.select_related('passenger_car_waybill'))
+
+        # нормы — один запрос на пару (сезон, дата), а не на путевой лист
+        by_key = {}
+        for rec in records:
+            wb = rec.passenger_car_waybill
+            by_key.setdefault((wb.norm_season, wb.date), set()).add(wb.car_id)
+        latest = {
+            key: NormsPassengerCars.objects.latest_per_car(*key, car_ids=car_ids)
+            for key, car_ids in by_key.items()
+        }
+
+        norms = {}
+        for rec in records:
+            wb = rec.passenger_car_waybill
+            if wb.pk not in norms:
+                norm = latest[(wb.norm_season, wb.date)].get(wb.car_id)
+                if not norm:
+                    raise ValidationError(
+                        f"Не найдена норма для путевого листа {wb.number}, сезон={wb.norm_season}"
+                    )
+                norms[wb.pk] = (_to_milli(norm.city_norm), _to_milli(norm.area_norm))
+
+            city_norm, area_norm = norms[wb.pk]
+            used_city = rec.distance_city_km * city_norm
+            used_area = rec.distance_area_km * area_norm
+            on_return = (
+                _to_milli(rec.fuel_before_departure)
+                - _to_milli(rec.fuel_used)
+                + _to_milli(rec.fuel_refueled)
+            )
+
+            rec.distance_total_km = rec.distance_city_km + rec.distance_area_km
+            rec.fuel_used_city = _from_milli(used_city)
+            rec.fuel_used_area = _from_milli(used_area)
+            rec.fuel_used_normal = _from_milli(used_city + used_area)
+            rec.fuel_on_return = _from_milli(on_return)
+
+        cls.objects.bulk_update(records, [
+            'distance_total_km',
+            'fuel_used_city',
+            'fuel_used_area',
+            'fuel_used_normal',
+            'fuel_on_return',
+        ], batch_size=batch_size)
+
     def save(self, *args, **kwargs):
-        from .models import OdometerFuelPassengerCar  # чтобы не было циклов
-        with transaction.atomic():
-            self._fill_start_values()
-            self._apply_norms()
+        """
+        Без собственного savepoint: внутри внешней транзакции ошибка
+        откатывает её целиком. Массовые вызовы оборачивают цикл
+        в свой transaction.atomic(); если нужна точка отката на одну
+        запись — вложенный transaction.atomic() вокруг save().
+        """
+        if _is_soft_delete_save(kwargs):
+            # мягкое удаление: производные поля и снимок не пересчитываем,
+            # нужен только пересчёт итогов путевого
+            super().save(*args, **kwargs)
+            _recalc_or_defer(self.passenger_car_waybill)
+            return
+
+        _load_waybill_with_car(self, 'passenger_car_waybill')
+        with transaction.atomic(savepoint=False):
+            state = self._load_start_state()
+            self._fill_start_values(state)
+            self._apply_norms(state)
             self._calc_fuel_on_return()
             super().save(*args, **kwargs)
 
-            # создаём новый снимок в OdometerFuelPassengerCar
-            OdometerFuelPassengerCar.objects.create(
+            # создаём новый снимок в OdometerFuelPassengerCar.
+            # Все значения уже посчитаны, поэтому пишем одним INSERT через
+            # bulk_create — без full_clean() и его проверочных SELECT'ов.
+            OdometerFuelPassengerCar.objects.bulk_create([OdometerFuelPassengerCar(
                 car=self.passenger_car_waybill.car,
                 odometer=self.odometer_after,
                 fuel=self.fuel_on_return,
                 date=self.passenger_car_waybill.date,  # или date.today()
                 waybill=self.passenger_car_waybill,
-            )
+            )])
 
             # пересчёт агрегатов по путевому
-            self.passenger_car_waybill.recalc_totals()
+            _recalc_or_defer(self.passenger_car_waybill)
 
 class OdometerFuelPassengerCar(SoftDeleteModel):
     car = models.ForeignKey(
@@ -672,7 +1299,7 @@ class OdometerFuelPassengerCar(SoftDeleteModel):
         null=False,
         blank=True,   # можно не заполнять в форме, если есть waybill
         help_text="остаток топлива, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     date = models.DateField(
@@ -690,6 +1317,15 @@ class OdometerFuelPassengerCar(SoftDeleteModel):
         help_text="путевой лист (если указан, данные подтянутся автоматически)",
     )
 
+    class Meta:
+        indexes = [
+            # последнее состояние машины: filter(car=...).order_by('-date', '-id').
+            # Только живые строки, odometer/fuel лежат в самом индексе —
+            # LIMIT 1 читается index-only, без обращения к таблице
+            models.Index(fields=['car', '-date', '-id'], include=['odometer', 'fuel'],
+                         condition=Q(deleted_at__isnull=True), name='ofpc_car_prev_idx'),
+        ]
+
     def clean(self):
         """
         Логика:
@@ -712,6 +1348,7 @@ class OdometerFuelPassengerCar(SoftDeleteModel):
             last_rec = (
                 self.waybill.records
                 .order_by('-id')
+                .only('odometer_after', 'fuel_on_return', 'arrival_time')
                 .first()
             )
 
@@ -748,8 +1385,9 @@ class OdometerFuelPassengerCar(SoftDeleteModel):
                 raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
-        # гарантируем, что перед сохранением срабатывает clean()
-        self.full_clean()
+        # гарантируем, что перед сохранением срабатывает clean();
+        # уже загруженные FK повторно в БД не проверяем
+        self.full_clean(exclude=_loaded_relations(self, 'car', 'waybill'))
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -762,7 +1400,6 @@ class FireTruck(SoftDeleteModel):
     number = models.CharField(
         max_length=9,
         null=False,
-        unique=True,
         help_text="гос. номер"
     )
 
@@ -784,6 +1421,16 @@ class FireTruck(SoftDeleteModel):
         help_text="тип"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='ftruck_alive_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['number'], condition=Q(deleted_at__isnull=True),
+                                    name='ftruck_number_alive_uniq'),
+        ]
+
     def __str__(self):
         return f"Пожарный автомобиль с гос. номером {self.number}"
     
@@ -805,21 +1452,21 @@ class NormsFireTruck(SoftDeleteModel):
         max_digits=4,
         decimal_places=3,
         help_text="норма с насосом, л/мин (или др.ед.)",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     without_pump_norm = models.DecimalField(
         max_digits=4,
         decimal_places=3,
         help_text="норма без насоса, л/мин (или др.ед.)",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     km_norm = models.DecimalField(
         max_digits=4,
         decimal_places=3,
         help_text="норма по пробегу, л/км",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     date = models.DateField(
@@ -828,15 +1475,24 @@ class NormsFireTruck(SoftDeleteModel):
         help_text="дата утверждения нормы"
     )
 
+    objects = NormsManager()
+
+    class Meta:
+        indexes = [
+            # см. NormsPassengerCars
+            models.Index(fields=['car', 'season', '-date', '-id'],
+                         include=['km_norm', 'with_pump_norm', 'without_pump_norm'],
+                         condition=Q(deleted_at__isnull=True), name='nft_car_season_idx'),
+        ]
+
     def __str__(self):
         return f"Норма {self.car.number} {self.season} от {self.date}"
 
-class FireTruckWaybill(SoftDeleteModel):
+class FireTruckWaybill(WaybillTotalsMixin, SoftDeleteModel):
     number = models.CharField(
         max_length=6,
         null=False,
         help_text="номер путевого листа",
-        unique=True,
     )
 
     car = models.ForeignKey(
@@ -846,9 +1502,10 @@ class FireTruckWaybill(SoftDeleteModel):
         related_name="waybills",
     )
 
+    # PROTECT: путевые листы водителя не удаляются вместе с ним
     driver = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        on_delete=models.PROTECT,
         related_name="fire_truck_driver",
         null=False,
         help_text="водитель"
@@ -881,109 +1538,82 @@ class FireTruckWaybill(SoftDeleteModel):
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="наличие ГСМ при выдаче, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     total_spent = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="всего израсходовано, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     total_received = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="всего получено (заправки), л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     required_by_norm = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="положено по норме, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     availability_upon_delivery = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="наличие при сдаче, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     savings = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="экономия, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     overrun = models.DecimalField(
         max_digits=6,
         decimal_places=3,
         null=False,
         editable=False,
-        default=Decimal('0.000'),
+        default=ZERO,
         help_text="перерасход, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['car', 'date'], name='ftw_car_date_idx'),
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='ftw_alive_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['number'], condition=Q(deleted_at__isnull=True),
+                                    name='ftw_number_alive_uniq'),
+        ]
+
     def __str__(self):
         return f"Путевой лист ПА {self.car.number} от {self.date}"
 
-    def recalc_totals(self, save=True):
-        start_state = (
-            OdometerFuelFireTruck.objects
-            .filter(car=self.car, date__lte=self.date)
-            .order_by('-date', '-id')
-            .first()
-        )
-        self.upon_issuance = start_state.fuel if start_state else Decimal('0.000')
-
-        qs = self.records.all()
-        agg = qs.aggregate(
-            total_spent=Sum('fuel_used'),
-            total_received=Sum('fuel_refueled'),
-            required_by_norm=Sum('fuel_used_normal'),
-        )
-
-        self.total_spent = agg['total_spent'] or Decimal('0.000')
-        self.total_received = agg['total_received'] or Decimal('0.000')
-        self.required_by_norm = agg['required_by_norm'] or Decimal('0.000')
-
-        last_record = qs.order_by('-id').first()
-        self.availability_upon_delivery = (
-            last_record.fuel_on_return if last_record else self.upon_issuance
-        )
-
-        diff = self.required_by_norm - self.total_spent
-        if diff >= 0:
-            self.savings = diff
-            self.overrun = Decimal('0.000')
-        else:
-            self.savings = Decimal('0.000')
-            self.overrun = -diff
-
-        if save:
-            self.save(update_fields=[
-                'upon_issuance', 'total_spent', 'total_received',
-                'required_by_norm', 'availability_upon_delivery',
-                'savings', 'overrun'
-            ])
-    
 class FireTruckWaybillRecord(SoftDeleteModel):
+    soft_delete_via_save = True
+
     fire_truck_waybill = models.ForeignKey(
         FireTruckWaybill,
         on_delete=models.CASCADE,
@@ -1020,16 +1650,16 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         validators=[MaxValueValidator(999999)]
     )
 
-    time_with_pump = models.PositiveIntegerField(
+    # минуты одной записи: smallint (до 32767 мин ≈ 22 сут.) с запасом,
+    # диапазон проверяет сам PositiveSmallIntegerField
+    time_with_pump = models.PositiveSmallIntegerField(
         null=False,
         help_text="время работы с насосом, мин",
-        validators=[MaxValueValidator(999999)]
     )
 
-    time_without_pump = models.PositiveIntegerField(
+    time_without_pump = models.PositiveSmallIntegerField(
         null=False,
         help_text="время работы без насоса, мин",
-        validators=[MaxValueValidator(999999)]
     )
 
     fuel_refueled = models.DecimalField(
@@ -1037,7 +1667,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         decimal_places=3,
         default=0,
         help_text="заправка, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used = models.DecimalField(
@@ -1045,7 +1675,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         decimal_places=3,
         null=False,
         help_text="фактически израсходовано, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     # автоматические поля
@@ -1055,7 +1685,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="топливо перед выездом, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     odometer_before = models.PositiveIntegerField(
@@ -1078,7 +1708,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="остаток топлива при возвращении, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used_by_distance = models.DecimalField(
@@ -1087,7 +1717,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="Топливо по пробегу, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used_with_pump = models.DecimalField(
@@ -1096,7 +1726,7 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="Топливо при работе с насосом, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
     fuel_used_without_pump = models.DecimalField(
@@ -1105,91 +1735,201 @@ class FireTruckWaybillRecord(SoftDeleteModel):
         null=False,
         editable=False,
         help_text="Топливо при работе без насоса, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
 
-    fuel_used_normal = models.DecimalField(
-        max_digits=6,
-        decimal_places=3,
-        null=False,
-        editable=False,
+    # сумму трёх составляющих считает сама БД при записи строки;
+    # три слагаемых по (6, 3) дают до 2999.997, отсюда max_digits=7
+    fuel_used_normal = models.GeneratedField(
+        expression=F('fuel_used_by_distance') + F('fuel_used_with_pump') + F('fuel_used_without_pump'),
+        output_field=models.DecimalField(max_digits=7, decimal_places=3),
+        db_persist=True,
         help_text="израсходовано по норме, л",
-        validators=[MinValueValidator(Decimal('0.000'))]
     )
 
     class Meta:
         ordering = ["id"]
-
-    def _fill_start_values(self):
+        indexes = [
+            models.Index(fields=['deleted_at'], name='ftw_rec_deleted_idx'),
+            # записи путевого в порядке ordering = ['id']
+            models.Index(fields=['fire_truck_waybill', 'id'], name='ftw_rec_wb_id_idx'),
+            models.Index(fields=['id'], condition=Q(deleted_at__isnull=True),
+                         name='ftw_rec_alive_idx'),
+        ]
+
+    def _load_start_state(self):
+        """
+        Последние показания одометра/топлива ПА и действующая норма —
+        одним запросом от строки машины (см. легковые).
+        """
         wb = self.fire_truck_waybill
-        car = wb.car
 
         last_state = (
             OdometerFuelFireTruck.objects
-            .filter(car=car)
+            .filter(car_id=wb.car_id)
             .order_by('-date', '-id')
-            .first()
         )
-        if not last_state:
+        norm = (
+            NormsFireTruck.objects
+            .filter(
+                car_id=wb.car_id,
+                season=wb.norm_season,
+                date__lte=wb.date,
+            )
+            .order_by('-date', '-id')
+        )
+        return (
+            FireTruck._base_manager
+            .filter(pk=wb.car_id)
+            .annotate(
+                last_odometer=Subquery(last_state.values('odometer')[:1]),
+                last_fuel=Subquery(last_state.values('fuel')[:1]),
+                km_norm=Subquery(norm.values('km_norm')[:1]),
+                with_pump_norm=Subquery(norm.values('with_pump_norm')[:1]),
+                without_pump_norm=Subquery(norm.values('without_pump_norm')[:1]),
+            )
+            .values_list(
+                'last_odometer', 'last_fuel',
+                'km_norm', 'with_pump_norm', 'without_pump_norm',
+                named=True,
+            )
+            .get()
+        )
+
+    def _fill_start_values(self, state):
+        if state.last_odometer is None:
+            car = self.fire_truck_waybill.car
             raise ValidationError(
                 f"Не найдены последние показания для ПА {car.number}. "
                 "Сначала создайте запись в OdometerFuelFireTruck."
             )
 
-        self.odometer_before = last_state.odometer
-        self.fuel_before_departure = last_state.fuel
-
-    def _apply_norms(self):
-        wb = self.fire_truck_waybill
-        car = wb.car
+        self.odometer_before = state.last_odometer
+        self.fuel_before_departure = state.last_fuel
 
-        norm = (
-            NormsFireTruck.objects
-            .filter(car=car, season=wb.norm_season, date__lte=wb.date)
-            .order_by('-date', '-id')
-            .first()
-        )
-        if not norm:
+    def _apply_norms(self, state):
+        if state.km_norm is None:
+            wb = self.fire_truck_waybill
             raise ValidationError(
-                f"Не найдена норма для ПА {car.number}, сезон={wb.norm_season}"
+                f"Не найдена норма для ПА {wb.car.number}, сезон={wb.norm_season}"
             )
 
         self.distance_km = self.odometer_after - self.odometer_before
 
-        self.fuel_used_by_distance = Decimal(self.distance_km) * norm.km_norm
-        self.fuel_used_with_pump = Decimal(self.time_with_pump) * norm.with_pump_norm
-        self.fuel_used_without_pump = Decimal(self.time_without_pump) * norm.without_pump_norm
+        by_distance = self.distance_km * _to_milli(state.km_norm)
+        with_pump = self.time_with_pump * _to_milli(state.with_pump_norm)
+        without_pump = self.time_without_pump * _to_milli(state.without_pump_norm)
 
-        self.fuel_used_normal = (
-            (self.fuel_used_by_distance or 0) +
-            (self.fuel_used_with_pump or 0) +
-            (self.fuel_used_without_pump or 0)
-        )
+        self.fuel_used_by_distance = _from_milli(by_distance)
+        self.fuel_used_with_pump = _from_milli(with_pump)
+        self.fuel_used_without_pump = _from_milli(without_pump)
 
     def _calc_fuel_on_return(self):
-        self.fuel_on_return = (
-            (self.fuel_before_departure or Decimal('0.000'))
-            - (self.fuel_used or Decimal('0.000'))
-            + (self.fuel_refueled or Decimal('0.000'))
+        self.fuel_on_return = _from_milli(
+            _to_milli(self.fuel_before_departure or 0)
+            - _to_milli(self.fuel_used)
+            + _to_milli(self.fuel_refueled)
+        )
+
+    @classmethod
+    def bulk_recalc(cls, qs, batch_size=1000):
+        """
+        Массовый пересчёт нормативных полей и остатка топлива для записей qs
+        — как PassengerCarWaybillRecord.bulk_recalc: норма одним запросом
+        на пару (сезон, дата), арифметика в целых тысячных, bulk_update.
+        Возвращает пересчитанные записи (с fuel_used_normal из БД).
+        """
+        records = list(qs.select_related('fire_truck_waybill'))
+
+        by_key = {}
+        for rec in records:
+            wb = rec.fire_truck_waybill
+            by_key.setdefault((wb.norm_season, wb.date), set()).add(wb.car_id)
+        latest = {
+            key: NormsFireTruck.objects.latest_per_car(*key, car_ids=car_ids)
+            for key, car_ids in by_key.items()
+        }
+
+        norms = {}
+        for rec in records:
+            wb = rec.fire_truck_waybill
+            if wb.pk not in norms:
+                norm = latest[(wb.norm_season, wb.date)].get(wb.car_id)
+                if not norm:
+                    raise ValidationError(
+                        f"Не найдена норма для путевого листа {wb.number}, сезон={wb.norm_season}"
+                    )
+                norms[wb.pk] = (
+                    _to_milli(norm.km_norm),
+                    _to_milli(norm.with_pump_norm),
+                    _to_milli(norm.without_pump_norm),
+                )
+
+            km_norm, with_pump_norm, without_pump_norm = norms[wb.pk]
+            rec.distance_km = rec.odometer_after - rec.odometer_before
+            by_distance = rec.distance_km * km_norm
+            with_pump = rec.time_with_pump * with_pump_norm
+            without_pump = rec.time_without_pump * without_pump_norm
+            on_return = (
+                _to_milli(rec.fuel_before_departure)
+                - _to_milli(rec.fuel_used)
+                + _to_milli(rec.fuel_refueled)
+            )
+
+            rec.fuel_used_by_distance = _from_milli(by_distance)
+            rec.fuel_used_with_pump = _from_milli(with_pump)
+            rec.fuel_used_without_pump = _from_milli(without_pump)
+            rec.fuel_on_return = _from_milli(on_return)
+
+        cls.objects.bulk_update(records, [
+            'distance_km',
+            'fuel_used_by_distance',
+            'fuel_used_with_pump',
+            'fuel_used_without_pump',
+            'fuel_on_return',
+        ], batch_size=batch_size)
+
+        # fuel_used_normal БД пересчитала сама, в объектах он устарел —
+        # перечитываем одним запросом на все записи
+        normal = dict(
+            cls.all_objects
+            .filter(pk__in=[rec.pk for rec in records])
+            .values_list('pk', 'fuel_used_normal')
         )
+        for rec in records:
+            rec.fuel_used_normal = normal[rec.pk]
+        return records
 
     def save(self, *args, **kwargs):
-        from .models import OdometerFuelFireTruck
-        with transaction.atomic():
-            self._fill_start_values()
-            self._apply_norms()
+        # без savepoint — см. PassengerCarWaybillRecord.save
+        if _is_soft_delete_save(kwargs):
+            super().save(*args, **kwargs)
+            _recalc_or_defer(self.fire_truck_waybill)
+            return
+
+        _load_waybill_with_car(self, 'fire_truck_waybill')
+        with transaction.atomic(savepoint=False):
+            state = self._load_start_state()
+            self._fill_start_values(state)
+            self._apply_norms(state)
             self._calc_fuel_on_return()
+            adding = self._state.adding
             super().save(*args, **kwargs)
+            if not adding:
+                # генерируемое поле Django возвращает только при INSERT;
+                # после UPDATE сбрасываем его, чтобы прочиталось из БД
+                self.__dict__.pop('fuel_used_normal', None)
 
-            OdometerFuelFireTruck.objects.create(
+            # снимок пишем одним INSERT, без full_clean() (см. легковые)
+            OdometerFuelFireTruck.objects.bulk_create([OdometerFuelFireTruck(
                 car=self.fire_truck_waybill.car,
                 odometer=self.odometer_after,
                 fuel=self.fuel_on_return,
                 date=self.fire_truck_waybill.date,
                 waybill=self.fire_truck_waybill,
-            )
+            )])
 
-            self.fire_truck_waybill.recalc_totals()
+            _recalc_or_defer(self.fire_truck_waybill)
 
 class OdometerFuelFireTruck(SoftDeleteModel):
     car = models.ForeignKey(
@@ -1209,7 +1949,7 @@ class OdometerFuelFireTruck(SoftDeleteModel):
         decimal_places=3,
         null=False,
         blank=True,
-        validators=[MinValueValidator(Decimal('0.000'))]
+        validators=[MinValueValidator(ZERO)]
     )
     date = models.DateField(
         default=date.today,
@@ -1223,6 +1963,12 @@ class OdometerFuelFireTruck(SoftDeleteModel):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['car', '-date', '-id'], include=['odometer', 'fuel'],
+                         condition=Q(deleted_at__isnull=True), name='offt_car_prev_idx'),
+        ]
+
     def clean(self):
         super().clean()
 
@@ -1233,6 +1979,7 @@ class OdometerFuelFireTruck(SoftDeleteModel):
             last_rec = (
                 self.waybill.records
                 .order_by('-id')
+                .only('odometer_after', 'fuel_on_return', 'arrival_time')
                 .first()
             )
 
@@ -1263,7 +2010,8 @@ class OdometerFuelFireTruck(SoftDeleteModel):
                 raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # см. OdometerFuelPassengerCar.save
+        self.full_clean(exclude=_loaded_relations(self, 'car', 'waybill'))
         super().save(*args, **kwargs)
 
     def __str__(self):
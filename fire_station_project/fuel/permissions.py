@@ -1,6 +1,40 @@
 # fuel/permissions.py
+import threading
+
+from cachetools import TTLCache
 from rest_framework.permissions import BasePermission
 
+from .models import Permission
+
+
+# Карта role_id -> Permission, загружается одним запросом на все роли.
+# Сигналы на Permission/Role сбрасывают её в текущем процессе; TTL нужен,
+# чтобы правки из других процессов (воркеров) тоже доезжали.
+PERMISSIONS_CACHE_TTL_SECONDS = 60
+_permissions_cache = TTLCache(maxsize=1, ttl=PERMISSIONS_CACHE_TTL_SECONDS)
+_permissions_cache_lock = threading.Lock()
+
+
+def _permissions_by_role() -> dict:
+    with _permissions_cache_lock:
+        mapping = _permissions_cache.get('all')
+        if mapping is None:
+            mapping = {perm.role_id: perm for perm in Permission.objects.all()}
+            _permissions_cache['all'] = mapping
+        return mapping
+
+
+def permission_for_role(role_id):
+    """
+    Permission роли (или None) без отдельного запроса на каждую проверку.
+    """
+    return _permissions_by_role().get(role_id)
+
+
+def invalidate_permissions_cache() -> None:
+    with _permissions_cache_lock:
+        _permissions_cache.clear()
+
 
 class CanBookCarFromMobile(BasePermission):
     """
@@ -11,22 +45,19 @@ class CanBookCarFromMobile(BasePermission):
     """
 
     def has_permission(self, request, view):
-        user = request.user
         payload = request.auth or {}
 
-        # 1. Пользователь должен быть аутентифицирован и иметь роль
-        role = getattr(user, 'role', None)
-        if not user or not role:
+        # 1. Токен должен быть выдан именно для мобильного клиента —
+        #    самый частый отказ, проверяем его до любых обращений к user
+        if payload.get("client") != "mobile":
             return False
 
-        # 2. Токен должен быть выдан именно для мобильного клиента
-        client = payload.get("client")
-        if client != "mobile":
+        # 2. Пользователь должен быть аутентифицирован и иметь роль
+        user = request.user
+        if not user or not getattr(user, 'role_id', None):
             return False
 
-        # 3. Берём объект Permission, связанный с ролью
-        # В модели Permission: related_name="role"
-        # Значит у Role обратное поле называется role
-        perm = getattr(role, "role", None)  # Permission или None
+        # 3. Берём объект Permission, связанный с ролью, из общей карты
+        perm = user.perms  # Permission или None
 
-        return bool(perm and perm.can_use_mobile_booking)
\ No newline at end of file
+        return bool(perm and perm.can_use_mobile_booking)
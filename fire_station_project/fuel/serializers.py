@@ -1,5 +1,12 @@
 # fuel/serializers.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import models
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 from .models import (
     Role, Permission, User,
     PassengerCar, NormsPassengerCars, PassengerCarWaybill,
@@ -9,12 +16,67 @@ from .models import (
 )
 
 
+def _alive_unique(model):
+    """
+    Уникальность среди живых строк (менеджер objects отбрасывает удалённые).
+    В моделях это частичные UniqueConstraint с условием deleted_at IS NULL,
+    а такое условие DRF на входных данных проверить не может.
+    """
+    return {'validators': [UniqueValidator(queryset=model.objects.all())]}
+
+
+class FuelDecimalField(serializers.DecimalField):
+    """
+    DecimalField без повторного квантования: значения из БД уже приходят
+    с нужным числом знаков, поэтому их достаточно отформатировать.
+    Остальные случаи (float, другая точность, localize) — обычным путём DRF.
+    """
+
+    def to_representation(self, value):
+        if (
+            type(value) is Decimal
+            and not self.localize
+            and not self.normalize_output
+            and value.as_tuple().exponent == -self.decimal_places
+        ):
+            if getattr(self, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+                return f'{value:f}'
+            return value
+        return super().to_representation(value)
+
+
+class FuelModelSerializer(serializers.ModelSerializer):
+    """
+    Базовый сериализатор для таблиц с топливом и пробегом:
+    DecimalField модели отдаются через FuelDecimalField,
+    вычисляемые (GeneratedField) колонки — по их output_field, только на чтение.
+    """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.DecimalField: FuelDecimalField,
+    }
+
+    def build_standard_field(self, field_name, model_field):
+        if isinstance(model_field, models.GeneratedField):
+            output_field = model_field.output_field
+            field_class = self.serializer_field_mapping[type(output_field)]
+            field_kwargs = {'read_only': True}
+            if isinstance(output_field, models.DecimalField):
+                field_kwargs['max_digits'] = output_field.max_digits
+                field_kwargs['decimal_places'] = output_field.decimal_places
+            return field_class, field_kwargs
+        return super().build_standard_field(field_name, model_field)
+
+
 # --- Роли и права ------------------------------------------------------------
 
 class RoleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Role
         fields = '__all__'
+        extra_kwargs = {
+            'name': _alive_unique(Role),
+        }
 
 
 class PermissionSerializer(serializers.ModelSerializer):
@@ -25,12 +87,63 @@ class PermissionSerializer(serializers.ModelSerializer):
 
 # --- Пользователь ------------------------------------------------------------
 
+class UserListSerializer(serializers.ListSerializer):
+    """
+    Массовое создание пользователей: POST /users/ со списком
+    (UserViewSet.get_serializer передаёт many=True).
+    Хеширование пароля — основная цена создания; bcrypt и pbkdf2 отпускают
+    GIL, поэтому хешируем в небольшом пуле потоков и пишем всех одним
+    bulk_create.
+    """
+    bulk_batch_size = 500
+    # пул живёт внутри воркера запроса — не отдаём ему все ядра машины
+    max_hash_workers = 4
+    unique_fields = ('login', 'phone', 'driver_license')
+
+    def to_internal_value(self, data):
+        # UniqueValidator сверяет каждый элемент только с БД, повторы
+        # внутри одной пачки ловим здесь, до bulk_create; ошибки — по
+        # элементам, в том же виде, что и ошибки полей
+        attrs = super().to_internal_value(data)
+        errors = [{} for _ in attrs]
+        for field in self.unique_fields:
+            seen = set()
+            for i, item in enumerate(attrs):
+                value = item.get(field)
+                if value in (None, ''):
+                    continue
+                if value in seen:
+                    errors[i][field] = ['Значение повторяется в этом списке.']
+                seen.add(value)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        users = []
+        passwords = []
+        for item in validated_data:
+            item = dict(item)
+            passwords.append(item.pop('password'))
+            users.append(User(**item))
+
+        workers = max(1, min(self.max_hash_workers, os.cpu_count() or 1, len(users)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(User.set_password, users, passwords))
+
+        return User.objects.bulk_create(users, batch_size=self.bulk_batch_size)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        list_serializer_class = UserListSerializer
         extra_kwargs = {
             'password': {'write_only': True},
+            'login': _alive_unique(User),
+            'phone': _alive_unique(User),
+            'driver_license': _alive_unique(User),
         }
 
     def create(self, validated_data):
@@ -59,24 +172,30 @@ class PassengerCarSerializer(serializers.ModelSerializer):
     class Meta:
         model = PassengerCar
         fields = '__all__'
+        extra_kwargs = {
+            'number': _alive_unique(PassengerCar),
+        }
 
 
-class NormsPassengerCarsSerializer(serializers.ModelSerializer):
+class NormsPassengerCarsSerializer(FuelModelSerializer):
     class Meta:
         model = NormsPassengerCars
         fields = '__all__'
 
 
-class OdometerFuelPassengerCarSerializer(serializers.ModelSerializer):
+class OdometerFuelPassengerCarSerializer(FuelModelSerializer):
     class Meta:
         model = OdometerFuelPassengerCar
         fields = '__all__'
 
 
-class PassengerCarWaybillSerializer(serializers.ModelSerializer):
+class PassengerCarWaybillSerializer(FuelModelSerializer):
     class Meta:
         model = PassengerCarWaybill
         fields = '__all__'
+        extra_kwargs = {
+            'number': _alive_unique(PassengerCarWaybill),
+        }
         read_only_fields = [
             'upon_issuance',
             'total_spent',
@@ -88,7 +207,7 @@ class PassengerCarWaybillSerializer(serializers.ModelSerializer):
         ]
 
 
-class PassengerCarWaybillRecordSerializer(serializers.ModelSerializer):
+class PassengerCarWaybillRecordSerializer(FuelModelSerializer):
     class Meta:
         model = PassengerCarWaybillRecord
         fields = '__all__'
@@ -110,24 +229,30 @@ class FireTruckSerializer(serializers.ModelSerializer):
     class Meta:
         model = FireTruck
         fields = '__all__'
+        extra_kwargs = {
+            'number': _alive_unique(FireTruck),
+        }
 
 
-class NormsFireTruckSerializer(serializers.ModelSerializer):
+class NormsFireTruckSerializer(FuelModelSerializer):
     class Meta:
         model = NormsFireTruck
         fields = '__all__'
 
 
-class OdometerFuelFireTruckSerializer(serializers.ModelSerializer):
+class OdometerFuelFireTruckSerializer(FuelModelSerializer):
     class Meta:
         model = OdometerFuelFireTruck
         fields = '__all__'
 
 
-class FireTruckWaybillSerializer(serializers.ModelSerializer):
+class FireTruckWaybillSerializer(FuelModelSerializer):
     class Meta:
         model = FireTruckWaybill
         fields = '__all__'
+        extra_kwargs = {
+            'number': _alive_unique(FireTruckWaybill),
+        }
         read_only_fields = [
             'upon_issuance',
             'total_spent',
@@ -139,7 +264,7 @@ class FireTruckWaybillSerializer(serializers.ModelSerializer):
         ]
 
 
-class FireTruckWaybillRecordSerializer(serializers.ModelSerializer):
+class FireTruckWaybillRecordSerializer(FuelModelSerializer):
     class Meta:
         model = FireTruckWaybillRecord
         fields = '__all__'
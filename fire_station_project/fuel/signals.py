@@ -1,8 +1,13 @@
 # fuel/signals.py
-from django.db.models.signals import post_migrate
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.signals import post_migrate, post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Role, Permission
+from .auth import invalidate_user_cache
+from .permissions import invalidate_permissions_cache
+from .models import Role, Permission, User
 
 
 # Здесь описываем дефолтные роли и права для них.
@@ -181,6 +186,23 @@ DEFAULT_ROLES = [
     },
 ]
 
+# Справочник только для чтения: случайная правка словаря в рантайме
+# не должна менять права, которые получат новые роли.
+DEFAULT_ROLES = tuple(
+    {"name": role_def["name"], "permissions": MappingProxyType(role_def["permissions"])}
+    for role_def in DEFAULT_ROLES
+)
+
+# Опечатка в ключе (например, кириллическая буква в имени поля) иначе
+# всплыла бы только на migrate, поэтому сверяем ключи с моделью при импорте.
+_PERMISSION_FIELDS = {field.name for field in Permission._meta.concrete_fields}
+for _role_def in DEFAULT_ROLES:
+    _unknown = set(_role_def["permissions"]) - _PERMISSION_FIELDS
+    if _unknown:
+        raise ImproperlyConfigured(
+            f'DEFAULT_ROLES[{_role_def["name"]!r}]: неизвестные права {sorted(_unknown)}'
+        )
+
 
 @receiver(post_migrate)
 def create_default_roles_and_permissions(sender, **kwargs):
@@ -193,13 +215,61 @@ def create_default_roles_and_permissions(sender, **kwargs):
     if sender.name != 'fuel':
         return
 
-    for role_def in DEFAULT_ROLES:
-        role_name = role_def["name"]
-        perm_data = role_def["permissions"]
+    names = [role_def["name"] for role_def in DEFAULT_ROLES]
+
+    role_ids = dict(Role.objects.filter(name__in=names).values_list('name', 'id'))
+    missing_roles = [Role(name=name) for name in names if name not in role_ids]
+    if missing_roles:
+        Role.objects.bulk_create(missing_roles, ignore_conflicts=True)
+        role_ids = dict(Role.objects.filter(name__in=names).values_list('name', 'id'))
+
+    # role — OneToOne без условия, поэтому смотрим и на удалённые Permission
+    with_permission = set(
+        Permission.all_objects
+        .filter(role_id__in=role_ids.values())
+        .values_list('role_id', flat=True)
+    )
+    missing_permissions = [
+        Permission(role_id=role_ids[role_def["name"]], **role_def["permissions"])
+        for role_def in DEFAULT_ROLES
+        if role_ids[role_def["name"]] not in with_permission
+    ]
+    if missing_permissions:
+        Permission.objects.bulk_create(missing_permissions, ignore_conflicts=True)
+
+    # bulk_create не шлёт post_save, кэши сбрасываем сами
+    if missing_roles or missing_permissions:
+        Role.objects.invalidate_cache()
+        invalidate_permissions_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """
+    Сбрасываем кэш аутентификации при изменении/удалении пользователя,
+    чтобы правки (роль, мягкое удаление и т.п.) сразу вступали в силу
+    в этом процессе; другие воркеры увидят их не позже чем через
+    USER_CACHE_TTL_SECONDS. Массовое удаление — см. UserQuerySet.delete.
+    """
+    invalidate_user_cache(instance.pk)
+
 
-        role, _ = Role.objects.get_or_create(name=role_name)
-        # создаём Permission только если его ещё нет для этой роли
-        Permission.objects.get_or_create(
-            role=role,
-            defaults=perm_data,
-        )
\ No newline at end of file
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def drop_cached_permissions(sender, **kwargs):
+    """
+    Сбрасываем карту role_id -> Permission после правок ролей/прав.
+    """
+    invalidate_permissions_cache()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def drop_cached_roles(sender, **kwargs):
+    """
+    Сбрасываем кэш справочника ролей (Role.objects.get_cached).
+    """
+    Role.objects.invalidate_cache()
@@ -1,3 +1,562 @@
-from django.test import TestCase
+import contextvars
+from datetime import date, time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from . import auth, models, views
+from .models import (
+    Role, User, bulk_mode, soft_delete_clock,
+    PassengerCar, NormsPassengerCars, PassengerCarWaybill,
+    PassengerCarWaybillRecord, OdometerFuelPassengerCar,
+    FireTruck, NormsFireTruck, FireTruckWaybill,
+    FireTruckWaybillRecord, OdometerFuelFireTruck,
+)
+from .serializers import FireTruckWaybillRecordSerializer, FuelDecimalField
+
+
+def _make_user(login='driver', phone='100', password='secret'):
+    user = User(
+        name='Иван', surname='Иванов', last_name='Иванович',
+        login=login, phone=phone, role=Role.objects.get(name='Водитель'),
+    )
+    user.set_password(password)
+    user.save()
+    return user
+
+
+def _waybill_updates(queries):
+    table = PassengerCarWaybill._meta.db_table
+    return sum(q['sql'].startswith(f'UPDATE "{table}"') for q in queries)
+
+
+class AuthModuleApiTests(TestCase):
+    def test_star_import_exposes_only_public_api(self):
+        namespace = {}
+        exec('from fuel.auth import *', namespace)
+        namespace.pop('__builtins__')
+        self.assertEqual(set(namespace), {
+            'JWTAuthentication',
+            'create_access_token',
+            'decode_access_token',
+            'invalidate_user_cache',
+        })
+
+
+class AuthCachesMixin:
+    def setUp(self):
+        super().setUp()
+        for cache in (auth._decode_cache, auth._reject_cache, auth._user_cache):
+            cache.clear()
+
+
+class DecodeAccessTokenTests(AuthCachesMixin, TestCase):
+    def test_repeated_decode_uses_cache(self):
+        token = auth._encode_hs256({'sub': 1, 'exp': int(auth.time.time()) + 60})
+
+        with mock.patch.object(auth, '_jwt_decode', wraps=auth._jwt_decode) as decode:
+            first = auth.decode_access_token(token)
+            second = auth.decode_access_token(token)
+
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first['sub'], 1)
+
+    def test_expired_cached_payload_is_not_returned(self):
+        exp = int(auth.time.time()) - 1
+        token = auth._encode_hs256({'sub': 1, 'exp': exp})
+        # payload попал в кэш, пока токен был жив
+        auth._decode_cache[auth._token_key(token.encode())] = {'sub': 1, 'exp': exp}
+
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            auth.decode_access_token(token)
+
+
+class TokenFormatTests(AuthCachesMixin, TestCase):
+    payload = {'sub': 7, 'login': 'driver', 'role': 2, 'client': 'web',
+               'pwd_fp': 'abc', 'iat': 1700000000, 'exp': 4102444800}
+
+    def test_tokens_match_stock_pyjwt_byte_for_byte(self):
+        ours = auth._encode_hs256(self.payload)
+        stock = jwt.encode(self.payload, auth.JWT_SECRET, algorithm='HS256')
+
+        self.assertEqual(ours, stock)
+
+    def test_tokens_decode_both_ways(self):
+        stock = jwt.encode(self.payload, auth.JWT_SECRET, algorithm='HS256')
+        self.assertEqual(auth.decode_access_token(stock), self.payload)
+
+        ours = auth._encode_hs256(self.payload)
+        self.assertEqual(
+            jwt.decode(ours, auth.JWT_SECRET, algorithms=['HS256'],
+                       options={'verify_sub': False}),
+            self.payload,
+        )
+
+    def test_token_without_exp_is_rejected(self):
+        token = jwt.encode({'sub': 7}, auth.JWT_SECRET, algorithm='HS256')
+
+        with self.assertRaises(jwt.MissingRequiredClaimError):
+            auth.decode_access_token(token)
+
+    def test_other_algorithms_are_rejected(self):
+        token = jwt.encode(self.payload, auth.JWT_SECRET, algorithm='HS512')
+
+        with self.assertRaises(jwt.InvalidAlgorithmError):
+            auth.decode_access_token(token)
+
+
+class RejectCacheTests(AuthCachesMixin, TestCase):
+    def _authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return auth.JWTAuthentication().authenticate(request)
+
+    def test_repeated_bad_token_is_rejected_without_decoding(self):
+        token = auth._encode_hs256({'sub': 1, 'exp': int(auth.time.time()) + 60})[:-2] + 'xx'
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Неверный токен'):
+            self._authenticate(token)
+
+        with mock.patch.object(auth, 'decode_access_token') as decode:
+            with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Неверный токен'):
+                self._authenticate(token)
+        decode.assert_not_called()
+
+    def test_expired_token_is_rejected(self):
+        token = auth._encode_hs256({'sub': 1, 'exp': int(auth.time.time()) - 1})
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Токен истёк'):
+            self._authenticate(token)
+
+
+class JWTAuthenticationTests(AuthCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = _make_user()
+        self.factory = APIRequestFactory()
+
+    def _authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return auth.JWTAuthentication().authenticate(request)
+
+    def test_valid_token(self):
+        user, payload = self._authenticate(auth.create_access_token(self.user))
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(payload['client'], 'web')
+
+    def test_cached_user_is_a_fresh_instance(self):
+        token = auth.create_access_token(self.user)
+        first, _ = self._authenticate(token)
+
+        with self.assertNumQueries(0):
+            second, _ = self._authenticate(token)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_role_is_a_per_request_copy_refreshed_on_role_save(self):
+        token = auth.create_access_token(self.user)
+        first, _ = self._authenticate(token)
+        second, _ = self._authenticate(token)
+
+        self.assertIsNot(first.role, second.role)
+        self.assertIsNot(first.role, Role.objects.get_cached(self.user.role_id))
+
+        role = Role.objects.get(pk=self.user.role_id)
+        role.name = 'Водитель-стажёр'
+        role.save()
+
+        third, _ = self._authenticate(token)
+        self.assertEqual(third.role.name, 'Водитель-стажёр')
+        self.assertEqual(first.role.name, 'Водитель')
+
+    def test_password_change_invalidates_token(self):
+        token = auth.create_access_token(self.user)
+        self._authenticate(token)
+
+        self.user.set_password('another')
+        self.user.save()
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Пароль был изменён'):
+            self._authenticate(token)
+
+    def test_pwd_fp_mismatch_is_rejected(self):
+        now = int(auth.time.time())
+        token = auth._encode_hs256({
+            'sub': self.user.pk, 'client': 'web', 'pwd_fp': 'not-the-fingerprint',
+            'iat': now, 'exp': now + 60,
+        })
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Пароль был изменён'):
+            self._authenticate(token)
+
+    def test_queryset_soft_delete_drops_cached_user(self):
+        token = auth.create_access_token(self.user)
+        self._authenticate(token)
+
+        User.objects.filter(pk=self.user.pk).delete()
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Пользователь не найден'):
+            self._authenticate(token)
+
+
+class PassengerWaybillTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        car = PassengerCar.objects.create(number='А001АА', brand='Lada', model='Vesta')
+        NormsPassengerCars.objects.create(
+            car=car, season='winter', date=date(2020, 1, 1),
+            city_norm=Decimal('0.100'), area_norm=Decimal('0.200'),
+        )
+        OdometerFuelPassengerCar.objects.create(
+            car=car, odometer=1000, fuel=Decimal('50.000'), date=date(2020, 1, 1),
+        )
+        self.waybill = PassengerCarWaybill.objects.create(
+            number='1', car=car, driver=_make_user(), date=date(2024, 1, 1),
+            norm_season='winter', fuel_type='petrol',
+        )
+
+    def _record(self):
+        return PassengerCarWaybillRecord(
+            passenger_car_waybill=self.waybill, target='выезд',
+            departure_time=time(8), arrival_time=time(9),
+            distance_city_km=10, distance_area_km=5,
+            fuel_refueled=Decimal('1.000'), fuel_used=Decimal('2.000'),
+        )
+
+
+class BulkModeTests(PassengerWaybillTestCase):
+    def test_bulk_mode_recalcs_once_on_exit(self):
+        with CaptureQueriesContext(connection) as queries:
+            with bulk_mode():
+                for _ in range(3):
+                    self._record().save()
+
+        self.assertEqual(_waybill_updates(queries.captured_queries), 1)
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('6.000'))
+
+
+class RecalcOnCommitTests(PassengerWaybillTestCase):
+    def test_saves_in_one_transaction_recalc_totals_once(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(3):
+                    self._record().save()
+
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(_waybill_updates(queries.captured_queries), 0)
+
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('6.000'))
+        self.assertEqual(self.waybill.availability_upon_delivery, Decimal('47.000'))
+
+    def test_recalc_survives_rolled_back_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._record().save()
+            try:
+                with transaction.atomic():
+                    self._record().save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('2.000'))
+
+
+class SoftDeleteRecordTests(PassengerWaybillTestCase):
+    def test_soft_delete_skips_recompute_and_updates_totals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self._record().save()
+        record = PassengerCarWaybillRecord.objects.last()
+        states = OdometerFuelPassengerCar.objects.count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delete()
+
+        self.assertEqual(OdometerFuelPassengerCar.objects.count(), states)
+        self.assertFalse(PassengerCarWaybillRecord.objects.filter(pk=record.pk).exists())
+        record.refresh_from_db(from_queryset=PassengerCarWaybillRecord.all_objects)
+        self.assertIsNotNone(record.deleted_at)
+        self.assertEqual(record.odometer_after, 1045)
+
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('4.000'))
+        self.assertEqual(self.waybill.availability_upon_delivery, Decimal('48.000'))
+
+
+class SoftDeleteClockTests(TestCase):
+    def test_instance_and_queryset_deletes_share_one_timestamp(self):
+        cars = [
+            PassengerCar.objects.create(number=f'А00{i}АА', brand='Lada', model='Vesta')
+            for i in range(3)
+        ]
+        user = _make_user()
+
+        with soft_delete_clock() as now:
+            cars[0].delete()
+            PassengerCar.objects.filter(pk__in=[cars[1].pk, cars[2].pk]).delete()
+            user.delete()
+
+        stamps = set(PassengerCar.all_objects.values_list('deleted_at', flat=True))
+        stamps.add(User.all_objects.get(pk=user.pk).deleted_at)
+        self.assertEqual(stamps, {now})
+
+    def test_nested_block_reuses_outer_timestamp(self):
+        with soft_delete_clock() as outer:
+            with soft_delete_clock() as inner:
+                self.assertIs(inner, outer)
+
+    def test_block_does_not_leak_into_other_contexts(self):
+        # другая asyncio-задача того же потока работает в своём контексте
+        with soft_delete_clock():
+            self.assertIsNone(contextvars.Context().run(models._soft_delete_now))
+
+
+class RecomputeTotalsCommandTests(PassengerWaybillTestCase):
+    def _run(self):
+        out, err = StringIO(), StringIO()
+        call_command('recompute_totals', kind='passenger', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_recomputes_records_and_totals(self):
+        for _ in range(2):
+            self._record().save()
+        PassengerCarWaybill.objects.filter(pk=self.waybill.pk).update(total_spent=0)
+        PassengerCarWaybillRecord.objects.update(fuel_used_normal=0)
+
+        out, _ = self._run()
+
+        self.assertIn('passenger: пересчитано путевых листов — 1', out)
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('4.000'))
+        self.assertEqual(
+            set(PassengerCarWaybillRecord.objects.values_list('fuel_used_normal', flat=True)),
+            {Decimal('2.000')},
+        )
+
+    def test_waybill_without_norm_is_reported_and_others_are_recomputed(self):
+        self._record().save()
+        car = PassengerCar.objects.create(number='В002ВВ', brand='Lada', model='Granta')
+        NormsPassengerCars.objects.create(
+            car=car, season='winter', date=date(2020, 1, 1),
+            city_norm=Decimal('0.100'), area_norm=Decimal('0.200'),
+        )
+        OdometerFuelPassengerCar.objects.create(
+            car=car, odometer=500, fuel=Decimal('30.000'), date=date(2020, 1, 1),
+        )
+        broken = PassengerCarWaybill.objects.create(
+            number='2', car=car, driver=self.waybill.driver, date=date(2024, 1, 1),
+            norm_season='winter', fuel_type='petrol',
+        )
+        record = self._record()
+        record.passenger_car_waybill = broken
+        record.save()
+        NormsPassengerCars.objects.filter(car=car).delete()
+        PassengerCarWaybill.objects.update(total_spent=0)
+
+        out = StringIO()
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, 'не пересчитано путевых листов: 1'):
+            call_command('recompute_totals', kind='passenger', stdout=out, stderr=err)
+
+        self.assertIn(f'путевой лист 2 (id={broken.pk}) не пересчитан', err.getvalue())
+        self.assertIn('passenger: пересчитано путевых листов — 1', out.getvalue())
+        self.waybill.refresh_from_db()
+        self.assertEqual(self.waybill.total_spent, Decimal('2.000'))
+        broken.refresh_from_db()
+        self.assertEqual(broken.total_spent, Decimal('0.000'))
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'fuel.hashers.BCryptSHA256PasswordHasher',
+    'fuel.hashers.PBKDF2PasswordHasher',
+])
+class PasswordHasherTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User(login='hasher', role=Role.objects.get(name='Водитель'))
+
+    def test_default_hasher_is_calibrated_bcrypt(self):
+        self.user.set_password('secret')
+
+        self.assertTrue(self.user.password.startswith('bcrypt_sha256$$2b$11$'))
+        self.assertTrue(self.user.check_password('secret'))
+
+    def test_set_password_with_explicit_pbkdf2_hasher(self):
+        self.user.set_password('secret', hasher='pbkdf2_sha256')
+
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$150000$'))
+        self.assertTrue(self.user.check_password('secret'))
+        self.assertFalse(self.user.check_password('wrong'))
+
+    def test_pbkdf2_hash_with_other_iterations_still_verifies(self):
+        # хеш, записанный с другим числом итераций (например, Django по умолчанию)
+        self.user.password = DjangoPBKDF2PasswordHasher().encode(
+            'secret', 'fixedsalt', iterations=1000,
+        )
+
+        self.assertTrue(self.user.check_password('secret'))
+        self.assertFalse(self.user.check_password('wrong'))
+
+    def test_calibrate_hasher_reports_default_hasher(self):
+        stdout, stderr = StringIO(), StringIO()
+
+        # цель заведомо недостижима — команда должна предупредить
+        with self.settings(PASSWORD_HASH_TARGET_MS=100_000):
+            call_command('calibrate_hasher', repeat=1, stdout=stdout, stderr=stderr)
+
+        self.assertRegex(
+            stdout.getvalue(),
+            r'^bcrypt_sha256 \(стоимость=11\): \d+ мс, цель 100000 мс',
+        )
+        self.assertIn('fuel/hashers.py', stderr.getvalue())
+
+
+class PasswordCheckCacheTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        models._password_checks.clear()
+        self.addCleanup(models._password_checks.clear)
+        self.user = User(login='cached', role=Role.objects.get(name='Водитель'))
+        self.user.set_password('secret')
+
+    def _checked(self, raw_password):
+        with mock.patch.object(
+            models, 'check_password', wraps=models.check_password,
+        ) as hasher_check:
+            result = self.user.check_password(raw_password)
+        return result, hasher_check.call_count
+
+    def test_repeated_success_skips_hasher(self):
+        self.assertEqual(self._checked('secret'), (True, 1))
+        self.assertIn(
+            models._password_check_key('secret', self.user.password),
+            models._password_checks,
+        )
+
+        self.assertEqual(self._checked('secret'), (True, 0))
+
+    def test_password_change_misses_cache(self):
+        self.assertEqual(self._checked('secret'), (True, 1))
+
+        self.user.set_password('changed')
+
+        self.assertEqual(self._checked('secret'), (False, 1))
+        self.assertEqual(self._checked('changed'), (True, 1))
+
+    def test_failed_check_is_not_cached(self):
+        self.assertEqual(self._checked('wrong'), (False, 1))
+        self.assertEqual(len(models._password_checks), 0)
+
+        self.assertEqual(self._checked('wrong'), (False, 1))
+
+
+class UserBulkCreateTests(TestCase):
+    # IsAuthenticated не работает с нашим User (нет is_authenticated),
+    # поэтому права здесь отключены — проверяем только сериализатор
+    view = staticmethod(views.UserViewSet.as_view({'post': 'create'}, permission_classes=[]))
+
+    def setUp(self):
+        super().setUp()
+        self.role = Role.objects.get(name='Водитель')
+
+    def _item(self, login, phone, **extra):
+        return {
+            'name': 'Иван', 'surname': 'Иванов', 'last_name': 'Иванович',
+            'login': login, 'phone': phone, 'password': f'{login}-pass',
+            'role': self.role.pk, **extra,
+        }
+
+    def _post(self, data):
+        request = APIRequestFactory().post('/api/users/', data, format='json')
+        return self.view(request)
+
+    def test_list_post_creates_users_with_usable_hashes(self):
+        response = self._post([self._item('first', '101'), self._item('second', '102')])
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotIn('password', response.data[0])
+        for login in ('first', 'second'):
+            user = User.objects.get(login=login)
+            self.assertTrue(user.check_password(f'{login}-pass'))
+            self.assertFalse(user.check_password('wrong'))
+
+    def test_in_batch_duplicates_rejected_per_item(self):
+        response = self._post([
+            self._item('first', '101', driver_license='AB1'),
+            self._item('second', '101'),
+            self._item('first', '103', driver_license='AB1'),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        duplicate = ['Значение повторяется в этом списке.']
+        self.assertEqual(response.data, [
+            {},
+            {'phone': duplicate},
+            {'login': duplicate, 'driver_license': duplicate},
+        ])
+        self.assertFalse(User.objects.filter(login__in=['first', 'second']).exists())
+
+
+class FuelUsedNormalTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        car = FireTruck.objects.create(number='П001ПП', brand='КамАЗ', model='43118', type='АЦ')
+        NormsFireTruck.objects.create(
+            car=car, season='winter', date=date(2020, 1, 1), km_norm=Decimal('0.300'),
+            with_pump_norm=Decimal('0.100'), without_pump_norm=Decimal('0.050'),
+        )
+        OdometerFuelFireTruck.objects.create(
+            car=car, odometer=1000, fuel=Decimal('100.000'), date=date(2020, 1, 1),
+        )
+        waybill = FireTruckWaybill.objects.create(
+            number='1', car=car, driver=_make_user(), date=date(2024, 1, 1),
+            norm_season='winter', fuel_type='petrol',
+        )
+        self.record = FireTruckWaybillRecord(
+            fire_truck_waybill=waybill, target='пожар',
+            departure_time=time(8), arrival_time=time(9), odometer_after=1010,
+            time_with_pump=20, time_without_pump=10, fuel_used=Decimal('5.000'),
+        )
+        self.record.save()
+
+    def _components(self, record):
+        return (record.fuel_used_by_distance + record.fuel_used_with_pump
+                + record.fuel_used_without_pump)
+
+    def test_generated_value_is_sum_of_components(self):
+        self.assertEqual(self.record.fuel_used_normal, Decimal('5.500'))
+        stored = FireTruckWaybillRecord.objects.get(pk=self.record.pk)
+        self.assertEqual(stored.fuel_used_normal, self._components(stored))
+
+    def test_generated_value_refreshed_after_update(self):
+        self.record.time_with_pump = 30
+        self.record.save()
+
+        self.assertEqual(self.record.fuel_used_with_pump, Decimal('3.000'))
+        self.assertEqual(self.record.fuel_used_normal, self._components(self.record))
+        stored = FireTruckWaybillRecord.objects.get(pk=self.record.pk)
+        self.assertEqual(self.record.fuel_used_normal, stored.fuel_used_normal)
+
+    def test_serializer_maps_generated_field_read_only(self):
+        serializer = FireTruckWaybillRecordSerializer(self.record)
+        field = serializer.fields['fuel_used_normal']
+
+        self.assertIsInstance(field, FuelDecimalField)
+        self.assertTrue(field.read_only)
+        self.assertEqual((field.max_digits, field.decimal_places), (7, 3))
+        self.assertEqual(serializer.data['fuel_used_normal'], '5.500')
@@ -0,0 +1,20 @@
+# fuel/utils.py
+
+
+def queryset_chunks(queryset, chunksize=1000):
+    """
+    Обходит queryset пачками по chunksize объектов, листая по pk
+    (WHERE pk > последний ORDER BY pk LIMIT chunksize), и отдаёт каждую
+    пачку списком. В памяти одновременно — не больше одной пачки,
+    а OFFSET не растёт с номером страницы.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunksize])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
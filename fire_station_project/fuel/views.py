@@ -6,7 +6,6 @@ from django.http import HttpResponse
 from io import BytesIO
 from django.conf import settings
 from openpyxl import Workbook, load_workbook
-from decimal import Decimal
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from urllib.parse import quote
 
@@ -16,6 +15,7 @@ from .models import (
     PassengerCarWaybillRecord, OdometerFuelPassengerCar,
     FireTruck, NormsFireTruck, FireTruckWaybill,
     FireTruckWaybillRecord, OdometerFuelFireTruck,
+    ZERO,
 )
 from .serializers import (
     RoleSerializer, PermissionSerializer, UserSerializer,
@@ -49,6 +49,12 @@ class UserViewSet(SoftDeleteModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        # POST со списком — массовое создание (UserListSerializer)
+        if self.action == 'create' and isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
 # --- Легковые ---
 
 class PassengerCarViewSet(SoftDeleteModelViewSet):
@@ -173,14 +179,16 @@ class PassengerCarWaybillViewSet(SoftDeleteModelViewSet):
                             'passenger_car_waybill__car')
             .order_by('passenger_car_waybill__date', 'id')
         )
+        # один запрос вместо трёх (exists(), first() и сам цикл)
+        records = list(records)
 
-        if not records.exists():
+        if not records:
             return Response(
                 {"detail": "Записей за указанный период не найдено"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        car = records.first().passenger_car_waybill.car
+        car = records[0].passenger_car_waybill.car
 
         # ----- открываем шаблон -----
         template_path = settings.BASE_DIR / 'report_templates' / 'passenger_car.xlsx'
@@ -197,11 +205,11 @@ class PassengerCarWaybillViewSet(SoftDeleteModelViewSet):
         total_distance_city = 0
         total_distance_area = 0
         total_distance = 0
-        total_fuel_used_city = Decimal('0.000')
-        total_fuel_used_area = Decimal('0.000')
-        total_fuel_used_fact = Decimal('0.000')
-        total_fuel_used_normal = Decimal('0.000')
-        total_fuel_refueled = Decimal('0.000')
+        total_fuel_used_city = ZERO
+        total_fuel_used_area = ZERO
+        total_fuel_used_fact = ZERO
+        total_fuel_used_normal = ZERO
+        total_fuel_refueled = ZERO
         total_savings = 0.0
         total_overrun = 0.0
 
@@ -343,7 +351,7 @@ class PassengerCarWaybillViewSet(SoftDeleteModelViewSet):
         return response
 
 class PassengerCarWaybillRecordViewSet(SoftDeleteModelViewSet):
-    queryset = PassengerCarWaybillRecord.objects.select_related('passenger_car_waybill')
+    queryset = PassengerCarWaybillRecord.objects.select_related('passenger_car_waybill__car')
     serializer_class = PassengerCarWaybillRecordSerializer
 
 # --- Пожарные ---
@@ -470,14 +478,16 @@ class FireTruckWaybillViewSet(SoftDeleteModelViewSet):
                             'fire_truck_waybill__car')
             .order_by('fire_truck_waybill__date', 'id')
         )
+        # один запрос вместо трёх (exists(), first() и сам цикл)
+        records = list(records)
 
-        if not records.exists():
+        if not records:
             return Response(
                 {"detail": "Записей за указанный период не найдено"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        car = records.first().fire_truck_waybill.car
+        car = records[0].fire_truck_waybill.car
 
         # ----- открываем шаблон -----
         template_path = settings.BASE_DIR / 'report_templates' / 'fire_truck.xlsx'
@@ -496,14 +506,14 @@ class FireTruckWaybillViewSet(SoftDeleteModelViewSet):
         total_distance_km = 0
         total_time_with_pump = 0
         total_time_without_pump = 0
-        total_fuel_by_distance = Decimal('0.000')
-        total_fuel_with_pump = Decimal('0.000')
-        total_fuel_without_pump = Decimal('0.000')
-        total_fuel_normal = Decimal('0.000')
-        total_fuel_fact = Decimal('0.000')
-        total_fuel_refueled = Decimal('0.000')
-        total_savings = Decimal('0.000')
-        total_overrun = Decimal('0.000')
+        total_fuel_by_distance = ZERO
+        total_fuel_with_pump = ZERO
+        total_fuel_without_pump = ZERO
+        total_fuel_normal = ZERO
+        total_fuel_fact = ZERO
+        total_fuel_refueled = ZERO
+        total_savings = ZERO
+        total_overrun = ZERO
 
         # Стили
         thin_border = Border(
@@ -545,8 +555,8 @@ class FireTruckWaybillViewSet(SoftDeleteModelViewSet):
             name_place = (rec.target or '') + (f" {route}" if route else '')
 
             # Экономия/перерасход
-            savings = Decimal('0.000')
-            overrun = Decimal('0.000')
+            savings = ZERO
+            overrun = ZERO
 
             fio = f"{driver.surname} {driver.name[0]}. {driver.last_name[0]}."
 
@@ -593,13 +603,13 @@ class FireTruckWaybillViewSet(SoftDeleteModelViewSet):
             # 18–19. Экономия/перерасход
             if rec.fuel_used_normal > rec.fuel_used:
                 savings = rec.fuel_used_normal - rec.fuel_used
-                overrun = Decimal('0.000')
+                overrun = ZERO
             elif rec.fuel_used_normal < rec.fuel_used:
                 overrun = rec.fuel_used - rec.fuel_used_normal
-                savings = Decimal('0.000')
+                savings = ZERO
             else:
-                savings = Decimal('0.000')
-                overrun = Decimal('0.000')
+                savings = ZERO
+                overrun = ZERO
 
             cell = ws.cell(row=row_idx, column=18, value=float(savings))           # R Экономия
             cell.fill = green_fill
@@ -668,5 +678,5 @@ class FireTruckWaybillViewSet(SoftDeleteModelViewSet):
         return response
 
 class FireTruckWaybillRecordViewSet(SoftDeleteModelViewSet):
-    queryset = FireTruckWaybillRecord.objects.select_related('fire_truck_waybill')
+    queryset = FireTruckWaybillRecord.objects.select_related('fire_truck_waybill__car')
     serializer_class = FireTruckWaybillRecordSerializer
\ No newline at end of file